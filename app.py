@@ -5,11 +5,19 @@ Initializes and runs the Plotly Dash web application.
 import dash
 from dash import html
 import dash_bootstrap_components as dbc
+import pandas as pd
+import plotly.io as pio
 
-from config.api_keys import api_keys
+from config.api_keys import get_api_keys
 from dashboard.layout import create_layout
 from dashboard.callbacks import register_callbacks
 
+# Serialize callback responses and figures with orjson instead of the stdlib json encoder
+pio.json.config.default_engine = 'orjson'
+
+# Copy-on-write (pandas >= 2.1) lets derived frames share columns until they are modified
+pd.set_option('mode.copy_on_write', True)
+
 # Initialize the Dash app
 app = dash.Dash(
     __name__,
@@ -22,8 +30,8 @@ app = dash.Dash(
 # Set app title
 app.title = "Spotify & YouTube Trend Analysis Dashboard"
 
-# Create and set the layout
-app.layout = create_layout()
+# Serve the layout per page load so each browser session gets its own id
+app.layout = create_layout
 
 # Register all callbacks
 register_callbacks(app)
@@ -32,6 +40,8 @@ register_callbacks(app)
 server = app.server
 
 if __name__ == '__main__':
+    api_keys = get_api_keys()
+
     print("🚀 Starting Spotify-YouTube Trend Analysis Dashboard...")
     print(f"📊 Dashboard will be available at: http://127.0.0.1:{api_keys.port}")
     print("📝 Make sure your .env file contains valid API keys!")
@@ -0,0 +1,91 @@
+/*
+ * Clientside chart builders for the Spotify-YouTube trend analysis dashboard.
+ * Each function receives the chart-data-store payload and the active tab and
+ * returns a Plotly figure, so these charts need no server round trip.
+ */
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    charts: {
+        buildTrending: function(chartData, activeTab) {
+            // Skip inactive tabs; they render when selected
+            if (activeTab !== 'trending') {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            if (!chartData || !chartData.top10.length) {
+                return {data: [], layout: {}};
+            }
+
+            // One horizontal bar trace per platform, like px.bar(color='platform')
+            var traces = {};
+            chartData.top10.forEach(function(row) {
+                var platform = row.platform || '';
+                if (!traces[platform]) {
+                    traces[platform] = {
+                        type: 'bar', orientation: 'h', name: platform,
+                        showlegend: platform !== '', x: [], y: []
+                    };
+                }
+                traces[platform].x.push(row.engagement_score);
+                traces[platform].y.push(row.content_title);
+            });
+
+            return {
+                data: Object.values(traces),
+                layout: {
+                    title: {text: 'Top Trending Content by Engagement'},
+                    height: 500,
+                    barmode: 'relative',
+                    legend: {title: {text: 'platform'}},
+                    xaxis: {title: {text: 'Engagement Score'}},
+                    yaxis: {title: {text: 'Content Title'}, categoryorder: 'total ascending'}
+                }
+            };
+        },
+
+        buildComparison: function(chartData, activeTab) {
+            if (activeTab !== 'comparison') {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            if (!chartData || !chartData.platform_counts.labels.length) {
+                return {data: [], layout: {}};
+            }
+
+            var counts = chartData.platform_counts;
+            return {
+                data: [{
+                    type: 'pie',
+                    labels: counts.labels,
+                    values: counts.values,
+                    hole: 0.4
+                }],
+                layout: {
+                    title: {text: 'Content Distribution by Platform'},
+                    height: 500
+                }
+            };
+        },
+
+        buildGenre: function(chartData, activeTab) {
+            if (activeTab !== 'genre') {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            if (!chartData || !chartData.category_counts.labels.length) {
+                return {data: [], layout: {}};
+            }
+
+            var counts = chartData.category_counts;
+            return {
+                data: [{
+                    type: 'bar',
+                    x: counts.labels,
+                    y: counts.values
+                }],
+                layout: {
+                    title: {text: 'Content Distribution by Genre/Category'},
+                    height: 500,
+                    xaxis: {title: {text: 'Genre/Category'}, type: 'category'},
+                    yaxis: {title: {text: 'Count'}}
+                }
+            };
+        }
+    }
+});
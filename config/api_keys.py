@@ -2,6 +2,7 @@
 Configuration module for loading API keys and application settings from environment variables.
 """
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -22,6 +23,17 @@ class APIKeys:
         self.debug = os.getenv('DEBUG', 'False').lower() == 'true'
         self.port = int(os.getenv('PORT', 8050))
 
+        # Server-side cache for DataFrames shared between callbacks
+        self.cache_type = os.getenv('CACHE_TYPE', 'FileSystemCache')
+        self.cache_dir = os.getenv('CACHE_DIR', '.dash_cache')
+        self.cache_timeout = int(os.getenv('CACHE_TIMEOUT', 600))
+
+        # Persistent YouTube API response cache (Redis when configured, else disk)
+        self.redis_url = os.getenv('REDIS_URL')
+        self.youtube_cache_dir = os.getenv('YOUTUBE_CACHE_DIR', '.yt_cache')
+        self.youtube_cache_ttl = int(os.getenv('YOUTUBE_CACHE_TTL', 3600))
+        self.youtube_http_cache_dir = os.getenv('YOUTUBE_HTTP_CACHE_DIR', '.httpcache')
+
     def validate_keys(self):
         """Validate that all required API keys are present."""
         missing_keys = []
@@ -38,13 +50,22 @@ class APIKeys:
 
         return True
 
-# Global instance for easy access
-api_keys = APIKeys()
+@lru_cache(maxsize=1)
+def get_api_keys() -> APIKeys:
+    """Create and validate the shared APIKeys instance on first use."""
+    keys = APIKeys()
+
+    try:
+        keys.validate_keys()
+        print("✅ All API keys loaded successfully!")
+    except ValueError as e:
+        print(f"⚠️  Warning: {e}")
+        print("Please update your .env file with the required API keys.")
+
+    return keys
 
-# Validate keys on import
-try:
-    api_keys.validate_keys()
-    print("✅ All API keys loaded successfully!")
-except ValueError as e:
-    print(f"⚠️  Warning: {e}")
-    print("Please update your .env file with the required API keys.")
+def __getattr__(name):
+    """Resolve the module-level ``api_keys`` instance lazily (PEP 562)."""
+    if name == 'api_keys':
+        return get_api_keys()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,62 +2,233 @@
 Dashboard callbacks module for the Spotify-YouTube trend analysis application.
 Handles interactive logic, data processing, and chart updates.
 """
-from dash import Input, Output, State, callback_context
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+from dash import Input, Output, State, ClientsideFunction, callback_context
+from dash.exceptions import PreventUpdate
+from flask_caching import Cache
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
-from datetime import datetime, timedelta
 
-from data.fetch_spotify import spotify_fetcher
-from data.fetch_youtube import youtube_fetcher
-from utils.preprocess import clean_spotify_data, clean_youtube_data
+from config.api_keys import get_api_keys
+from data.fetch_spotify import get_spotify_fetcher
+from data.fetch_youtube import get_youtube_fetcher
+from utils.preprocess import clean_all
 from utils.helpers import (
-    format_number, calculate_engagement_rate, merge_platform_data,
+    format_number, calculate_engagement_rates, merge_platform_data,
     get_top_content_by_metric, calculate_trend_metrics
 )
 
+# Shared pool for the independent Spotify/YouTube fetches, reused across interval ticks
+_fetch_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='api-fetch')
+
+# Refetches for a region within this window reuse the previous result
+FETCH_THROTTLE_SECONDS = 2.0
+_fetch_locks: Dict[str, threading.Lock] = {}
+_last_fetch_ts: Dict[str, float] = {}
+_last_result: Dict[str, Tuple[List[Dict], pd.DataFrame]] = {}
+
+# Raw fetch columns used downstream; everything else is dropped right after fetching
+SPOTIFY_STORE_COLS = ['platform', 'track_name', 'artist', 'genre', 'popularity',
+                      'release_date', 'market', 'fetched_at']
+YOUTUBE_STORE_COLS = ['platform', 'title', 'channel_title', 'category_id', 'view_count',
+                      'like_count', 'published_at', 'region_code', 'fetched_at']
+
+# Upper bound on points the engagement scatter sends to the browser
+MAX_SCATTER_POINTS = 2000
+SCATTER_TOP_VIEWS = 500
+
+# Columns shown in the content details table
+TABLE_COLUMNS = ['platform', 'content_title', 'creator', 'engagement_score',
+                 'category', 'view_count', 'like_count']
+
+# Server-side DataFrame cache; dcc.Store components only hold the cache keys
+cache = Cache()
+
+def load_cached_payload(key):
+    """Load a cached processed payload by key, returning None if missing or expired."""
+    return cache.get(key) if key else None
+
+def decimate_scatter_points(df: pd.DataFrame, max_points: int = MAX_SCATTER_POINTS,
+                            top_n: int = SCATTER_TOP_VIEWS) -> pd.DataFrame:
+    """
+    Limit the rows plotted in the engagement scatter.
+
+    Args:
+        df: DataFrame with view_count, like_count and engagement_rate columns
+        max_points: Maximum number of rows to keep
+        top_n: Number of most-viewed rows always kept
+
+    Returns:
+        The top_n most-viewed rows plus a reproducible random sample of the rest
+    """
+    if len(df) <= max_points:
+        return df
+
+    top = df.nlargest(top_n, 'view_count')
+    rest = df.drop(top.index).sample(max_points - top_n, random_state=0)
+    return pd.concat([top, rest])
+
+def top_category_counts(categories: pd.Series, n: int = 10) -> Dict[str, int]:
+    """
+    Count the most common categories.
+
+    Args:
+        categories: Category column, ideally with a categorical dtype
+        n: Number of categories to return
+
+    Returns:
+        Dictionary mapping category to count, most common first
+    """
+    if not isinstance(categories.dtype, pd.CategoricalDtype):
+        return categories.value_counts().head(n).to_dict()
+
+    # Histogram over the integer codes; missing values (code -1) are dropped
+    codes = categories.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(categories.cat.categories))
+    if len(counts) > n:
+        top_idx = np.argpartition(-counts, n)[:n]
+    else:
+        top_idx = np.arange(len(counts))
+    top_idx = top_idx[np.argsort(-counts[top_idx], kind='stable')]
+    top_idx = top_idx[counts[top_idx] > 0]
+    return dict(zip(categories.cat.categories[top_idx], counts[top_idx].tolist()))
+
+def build_processed_payload(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Precompute the derived data every chart, card and table callback needs.
+
+    Args:
+        df: Processed (cleaned and filtered) DataFrame
+
+    Returns:
+        Dictionary with the rows plus per-view aggregates
+    """
+    # Engagement rate (likes / views * 100, 0 when there are no views)
+    if 'view_count' in df.columns and 'like_count' in df.columns:
+        df = df.assign(engagement_rate=calculate_engagement_rates(df['like_count'], df['view_count']))
+        scatter_points = decimate_scatter_points(df)
+    else:
+        scatter_points = None
+
+    # Top content by engagement
+    if 'engagement_score' in df.columns and 'content_title' in df.columns:
+        top10 = get_top_content_by_metric(df, 'engagement_score', 10)
+    else:
+        top10 = None
+
+    # Content counts per platform and top categories
+    platform_counts = top_category_counts(df['platform']) if 'platform' in df.columns else {}
+    category_counts = top_category_counts(df['category']) if 'category' in df.columns else {}
+
+    # Metric card values (handle different metrics for different platforms)
+    avg_engagement_str = (format_number(df['engagement_score'].mean())
+                          if 'engagement_score' in df.columns else "N/A")
+    top_views_str = format_number(df['view_count'].max()) if 'view_count' in df.columns else "N/A"
+    active_creators_str = str(df['creator'].nunique()) if 'creator' in df.columns else "N/A"
+
+    return {
+        'rows': df,
+        'top10': top10,
+        'scatter_points': scatter_points,
+        'platform_counts': platform_counts,
+        'category_counts': category_counts,
+        'metrics': (str(len(df)), avg_engagement_str, top_views_str, active_creators_str)
+    }
+
+def build_chart_data(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract the small aggregates the clientside charts render from.
+
+    Args:
+        payload: Processed payload from build_processed_payload
+
+    Returns:
+        JSON-serializable dictionary for the chart-data-store
+    """
+    top10 = payload['top10']
+    if top10 is not None:
+        top10 = top10.reindex(columns=['content_title', 'engagement_score', 'platform'])
+        top10 = top10.astype(object).where(top10.notna(), None).to_dict('records')
+
+    # Counts are sent as parallel lists to keep their order in the browser
+    return {
+        'top10': top10 or [],
+        'platform_counts': {
+            'labels': list(payload['platform_counts'].keys()),
+            'values': list(payload['platform_counts'].values())
+        },
+        'category_counts': {
+            'labels': [str(label) for label in payload['category_counts'].keys()],
+            'values': list(payload['category_counts'].values())
+        }
+    }
+
+def fetch_trending_data(region: str) -> Tuple[List[Dict], pd.DataFrame]:
+    """
+    Fetch trending Spotify tracks and YouTube videos for a region.
+
+    Concurrent calls for the same region wait for the in-flight fetch, and
+    calls within FETCH_THROTTLE_SECONDS of the last fetch reuse its result,
+    so bursts of filter changes collapse into a single upstream request.
+
+    Args:
+        region: Country/region code (e.g., 'US', 'GB')
+
+    Returns:
+        Tuple of (spotify_tracks, youtube_videos)
+    """
+    with _fetch_locks.setdefault(region, threading.Lock()):
+        if time.monotonic() - _last_fetch_ts.get(region, 0.0) < FETCH_THROTTLE_SECONDS:
+            return _last_result[region]
+
+        # Fetch Spotify and YouTube data concurrently
+        spotify_future = _fetch_executor.submit(
+            get_spotify_fetcher().get_trending_tracks, limit=50, market=region
+        )
+        youtube_future = _fetch_executor.submit(
+            get_youtube_fetcher().get_trending_videos, region_code=region, max_results=50
+        )
+        result = (spotify_future.result(), youtube_future.result())
+
+        _last_result[region] = result
+        _last_fetch_ts[region] = time.monotonic()
+        return result
+
 def register_callbacks(app):
     """Register all dashboard callbacks."""
+    api_keys = get_api_keys()
+    cache.init_app(app.server, config={
+        'CACHE_TYPE': api_keys.cache_type,
+        'CACHE_DIR': api_keys.cache_dir,
+        'CACHE_DEFAULT_TIMEOUT': api_keys.cache_timeout
+    })
 
     @app.callback(
-        [Output('spotify-data-store', 'data'),
-         Output('youtube-data-store', 'data')],
+        [Output('processed-data-store', 'data'),
+         Output('chart-data-store', 'data')],
         [Input('interval-component', 'n_intervals'),
-         Input('region-filter', 'value')]
-    )
-    def update_data_stores(n_intervals, region):
-        """Update data stores with fresh API data."""
-        # Fetch Spotify data
-        spotify_tracks = spotify_fetcher.get_trending_tracks(limit=50, market=region)
-        spotify_df = pd.DataFrame(spotify_tracks) if spotify_tracks else pd.DataFrame()
-
-        # Fetch YouTube data
-        youtube_videos = youtube_fetcher.get_trending_videos(
-            region_code=region, max_results=50
-        )
-        youtube_df = pd.DataFrame(youtube_videos) if youtube_videos else pd.DataFrame()
-
-        return spotify_df.to_dict('records'), youtube_df.to_dict('records')
-
-    @app.callback(
-        Output('processed-data-store', 'data'),
-        [Input('spotify-data-store', 'data'),
-         Input('youtube-data-store', 'data'),
+         Input('region-filter', 'value'),
          Input('platform-filter', 'value'),
          Input('genre-filter', 'value'),
-         Input('time-filter', 'value')]
+         Input('time-filter', 'value')],
+        [State('session-id', 'data')]
     )
-    def process_data(spotify_data, youtube_data, platform, genre, time_range):
-        """Process and filter data based on user selections."""
-        # Convert stored data back to DataFrames
-        spotify_df = pd.DataFrame(spotify_data) if spotify_data else pd.DataFrame()
-        youtube_df = pd.DataFrame(youtube_data) if youtube_data else pd.DataFrame()
-
-        # Clean data
-        if not spotify_df.empty:
-            spotify_df = clean_spotify_data(spotify_df)
-        if not youtube_df.empty:
-            youtube_df = clean_youtube_data(youtube_df)
+    def process_data(n_intervals, region, platform, genre, time_range, session_id):
+        """Fetch, clean and filter data based on user selections."""
+        # Fetching is throttled and TTL-cached, so filter-only changes reuse recent results
+        spotify_tracks, youtube_videos = fetch_trending_data(region)
+
+        # Project to the columns used downstream (missing ones are added as empty)
+        spotify_df = pd.DataFrame(spotify_tracks).reindex(columns=SPOTIFY_STORE_COLS)
+        youtube_df = youtube_videos.reindex(columns=YOUTUBE_STORE_COLS)
+
+        # Clean both platforms concurrently
+        spotify_df, youtube_df = clean_all(spotify_df, youtube_df)
 
         # Apply platform filter
         if platform == 'spotify':
@@ -68,21 +239,28 @@ def register_callbacks(app):
             combined_df = merge_platform_data(spotify_df, youtube_df)
 
         if combined_df.empty:
-            return []
+            return None, None
 
-        # Apply genre filter
+        # Apply genre filter (categories are lowercased at clean time)
         if genre != 'all':
             if 'category' in combined_df.columns:
-                combined_df = combined_df[combined_df['category'].str.lower() == genre.lower()]
+                combined_df = combined_df[combined_df['category'] == genre.lower()]
 
-        # Apply time filter
+        # Apply time filter (fetched_at is stored as UTC epoch nanoseconds)
         if time_range != 'all' and 'fetched_at' in combined_df.columns:
             days = int(time_range.replace('D', ''))
-            cutoff_date = datetime.now() - timedelta(days=days)
-            combined_df['fetched_at'] = pd.to_datetime(combined_df['fetched_at'])
-            combined_df = combined_df[combined_df['fetched_at'] >= cutoff_date]
+            cutoff_ns = (pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=days)).value
+            combined_df = combined_df[combined_df['fetched_at'] >= cutoff_ns]
+
+        # Nothing left after filtering
+        if combined_df.empty:
+            return None, None
+
+        processed_key = f"{session_id}:processed"
+        payload = build_processed_payload(combined_df)
+        cache.set(processed_key, payload)
 
-        return combined_df.to_dict('records')
+        return processed_key, build_chart_data(payload)
 
     @app.callback(
         [Output('total-content', 'children'),
@@ -91,106 +269,34 @@ def register_callbacks(app):
          Output('active-creators', 'children')],
         [Input('processed-data-store', 'data')]
     )
-    def update_metric_cards(processed_data):
+    def update_metric_cards(processed_key):
         """Update metric summary cards."""
-        if not processed_data:
-            return "0", "0", "0", "0"
-
-        df = pd.DataFrame(processed_data)
+        payload = load_cached_payload(processed_key)
 
-        if df.empty:
+        if payload is None or payload['rows'].empty:
             return "0", "0", "0", "0"
 
-        # Calculate metrics
-        total_content = len(df)
-
-        # Average engagement (handle different metrics for different platforms)
-        if 'engagement_score' in df.columns:
-            avg_engagement = df['engagement_score'].mean()
-            avg_engagement_str = format_number(avg_engagement)
-        else:
-            avg_engagement_str = "N/A"
-
-        # Top views (YouTube specific)
-        if 'view_count' in df.columns:
-            top_views = df['view_count'].max()
-            top_views_str = format_number(top_views)
-        else:
-            top_views_str = "N/A"
-
-        # Active creators
-        if 'creator' in df.columns:
-            active_creators = df['creator'].nunique()
-            active_creators_str = str(active_creators)
-        else:
-            active_creators_str = "N/A"
-
-        return str(total_content), avg_engagement_str, top_views_str, active_creators_str
-
-    @app.callback(
-        Output('trending-chart', 'figure'),
-        [Input('processed-data-store', 'data'),
-         Input('chart-tabs', 'active_tab')]
-    )
-    def update_trending_chart(processed_data, active_tab):
-        """Update trending content chart."""
-        if not processed_data or active_tab != 'trending':
-            return go.Figure()
-
-        df = pd.DataFrame(processed_data)
-
-        if df.empty:
-            return go.Figure()
-
-        # Create trending chart based on available data
-        if 'engagement_score' in df.columns and 'content_title' in df.columns:
-            # Sort by engagement score
-            top_content = get_top_content_by_metric(df, 'engagement_score', 10)
-
-            fig = px.bar(
-                top_content,
-                x='engagement_score',
-                y='content_title',
-                orientation='h',
-                title='Top Trending Content by Engagement',
-                labels={'engagement_score': 'Engagement Score', 'content_title': 'Content Title'},
-                color='platform' if 'platform' in top_content.columns else None
-            )
-
-            fig.update_layout(
-                height=500,
-                xaxis_title="Engagement Score",
-                yaxis_title="Content Title",
-                yaxis={'categoryorder': 'total ascending'}
-            )
-
-            return fig
-
-        return go.Figure()
+        return payload['metrics']
 
     @app.callback(
         Output('engagement-chart', 'figure'),
         [Input('processed-data-store', 'data'),
          Input('chart-tabs', 'active_tab')]
     )
-    def update_engagement_chart(processed_data, active_tab):
+    def update_engagement_chart(processed_key, active_tab):
         """Update engagement analysis chart."""
-        if not processed_data or active_tab != 'engagement':
-            return go.Figure()
+        # Skip inactive tabs; they render when selected
+        if active_tab != 'engagement':
+            raise PreventUpdate
 
-        df = pd.DataFrame(processed_data)
+        payload = load_cached_payload(processed_key)
 
-        if df.empty:
+        if payload is None:
             return go.Figure()
 
-        # Create engagement analysis chart
-        if 'view_count' in df.columns and 'like_count' in df.columns:
-            # Calculate engagement rate
-            df['engagement_rate'] = df.apply(
-                lambda row: calculate_engagement_rate(row['like_count'], row['view_count']),
-                axis=1
-            )
-
+        # Create engagement analysis chart from the precomputed (decimated) points
+        df = payload['scatter_points']
+        if df is not None and not df.empty:
             fig = px.scatter(
                 df,
                 x='view_count',
@@ -211,91 +317,40 @@ def register_callbacks(app):
 
         return go.Figure()
 
-    @app.callback(
-        Output('comparison-chart', 'figure'),
-        [Input('processed-data-store', 'data'),
-         Input('chart-tabs', 'active_tab')]
-    )
-    def update_comparison_chart(processed_data, active_tab):
-        """Update cross-platform comparison chart."""
-        if not processed_data or active_tab != 'comparison':
-            return go.Figure()
-
-        df = pd.DataFrame(processed_data)
-
-        if df.empty or 'platform' not in df.columns:
-            return go.Figure()
-
-        # Create comparison chart
-        platform_counts = df['platform'].value_counts()
-
-        fig = px.pie(
-            values=platform_counts.values,
-            names=platform_counts.index,
-            title='Content Distribution by Platform',
-            hole=0.4
+    # Trending, comparison and genre charts are built in the browser from the small
+    # chart-data-store payload (see assets/charts.js)
+    for chart_id, function_name in [
+        ('trending-chart', 'buildTrending'),
+        ('comparison-chart', 'buildComparison'),
+        ('genre-chart', 'buildGenre')
+    ]:
+        app.clientside_callback(
+            ClientsideFunction(namespace='charts', function_name=function_name),
+            Output(chart_id, 'figure'),
+            [Input('chart-data-store', 'data'),
+             Input('chart-tabs', 'active_tab')]
         )
 
-        fig.update_layout(height=500)
-        return fig
-
-    @app.callback(
-        Output('genre-chart', 'figure'),
-        [Input('processed-data-store', 'data'),
-         Input('chart-tabs', 'active_tab')]
-    )
-    def update_genre_chart(processed_data, active_tab):
-        """Update genre/category analysis chart."""
-        if not processed_data or active_tab != 'genre':
-            return go.Figure()
-
-        df = pd.DataFrame(processed_data)
-
-        if df.empty:
-            return go.Figure()
-
-        # Create genre/category chart
-        if 'category' in df.columns:
-            genre_counts = df['category'].value_counts().head(10)
-
-            fig = px.bar(
-                x=genre_counts.index,
-                y=genre_counts.values,
-                title='Content Distribution by Genre/Category',
-                labels={'x': 'Genre/Category', 'y': 'Count'}
-            )
-
-            fig.update_layout(height=500)
-            return fig
-
-        return go.Figure()
-
     @app.callback(
         Output('content-table', 'data'),
         [Input('processed-data-store', 'data')]
     )
-    def update_content_table(processed_data):
+    def update_content_table(processed_key):
         """Update content details table."""
-        if not processed_data:
+        payload = load_cached_payload(processed_key)
+
+        if payload is None or payload['rows'].empty:
             return []
 
-        df = pd.DataFrame(processed_data)
+        df = payload['rows']
 
-        if df.empty:
-            return []
+        # Project to the table columns, falling back to raw YouTube fields
+        table_df = df.reindex(columns=TABLE_COLUMNS).astype(object)
+        if 'title' in df.columns:
+            table_df['content_title'] = table_df['content_title'].fillna(df['title'])
+        if 'channel_title' in df.columns:
+            table_df['creator'] = table_df['creator'].fillna(df['channel_title'])
+        if 'engagement_score' not in df.columns:
+            table_df['engagement_score'] = 0
 
-        # Prepare data for table display
-        table_data = []
-        for _, row in df.iterrows():
-            table_row = {
-                'platform': row.get('platform', 'N/A'),
-                'content_title': row.get('content_title', row.get('title', 'N/A')),
-                'creator': row.get('creator', row.get('channel_title', 'N/A')),
-                'engagement_score': row.get('engagement_score', 0),
-                'category': row.get('category', 'N/A'),
-                'view_count': row.get('view_count', 'N/A'),
-                'like_count': row.get('like_count', 'N/A')
-            }
-            table_data.append(table_row)
-
-        return table_data
+        return table_df.fillna('N/A').to_dict('records')
@@ -2,6 +2,7 @@
 Dashboard layout module for the Spotify-YouTube trend analysis application.
 Defines the UI components, charts, and interactive elements.
 """
+import uuid
 import dash
 from dash import html, dcc
 import dash_bootstrap_components as dbc
@@ -216,10 +217,12 @@ def create_layout():
         create_data_table(),
         create_footer(),
 
-        # Hidden divs for storing intermediate data
-        dcc.Store(id='spotify-data-store'),
-        dcc.Store(id='youtube-data-store'),
+        # Per-session id used to key server-side cached DataFrames
+        dcc.Store(id='session-id', data=str(uuid.uuid4())),
+
+        # Hidden divs for storing intermediate data (server-side cache key)
         dcc.Store(id='processed-data-store'),
+        dcc.Store(id='chart-data-store'),  # Small aggregates for clientside charts
 
         # Interval component for auto-refresh
         dcc.Interval(
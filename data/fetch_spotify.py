@@ -3,12 +3,52 @@ Spotify API data fetching module.
 Handles authentication, data retrieval, and processing for Spotify trending content.
 """
 import time
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from typing import List, Dict, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Iterable, Iterator, List, Dict, Optional
 import spotipy
 from spotipy.oauth2 import SpotifyClientCredentials
+from cachetools.func import ttl_cache
 import pandas as pd
-from config.api_keys import api_keys
+from functools import lru_cache
+from config.api_keys import get_api_keys
+
+# Pool for per-playlist track requests; its size caps concurrent calls to the Spotify API
+_playlist_executor = ThreadPoolExecutor(max_workers=5, thread_name_prefix='spotify-playlists')
+
+def _build_session() -> requests.Session:
+    """
+    Build a pooled HTTP session shared by the token manager and API client.
+
+    Returns:
+        requests.Session with keep-alive connection pooling and retries
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504])
+    )
+    session.mount('https://', adapter)
+    return session
+
+def _iter_tracks(playlist_pages: Iterable[Dict]) -> Iterator[Dict]:
+    """
+    Yield the track objects of playlist track pages, in playlist order.
+
+    Args:
+        playlist_pages: Playlist track responses
+
+    Yields:
+        Track dictionaries, skipping removed or unavailable entries
+    """
+    for playlist_tracks in playlist_pages:
+        for item in playlist_tracks['items']:
+            if item and item['track']:
+                yield item['track']
 
 class SpotifyDataFetcher:
     """Class to handle Spotify API data fetching and processing."""
@@ -16,17 +56,41 @@ class SpotifyDataFetcher:
     def __init__(self):
         """Initialize Spotify API client."""
         try:
+            api_keys = get_api_keys()
+            session = _build_session()
             client_credentials_manager = SpotifyClientCredentials(
                 client_id=api_keys.spotify_client_id,
-                client_secret=api_keys.spotify_client_secret
+                client_secret=api_keys.spotify_client_secret,
+                requests_session=session
+            )
+            self.sp = spotipy.Spotify(
+                client_credentials_manager=client_credentials_manager,
+                requests_session=session
             )
-            self.sp = spotipy.Spotify(client_credentials_manager=client_credentials_manager)
             self.sp.trace = False
             print("✅ Spotify API client initialized successfully!")
         except Exception as e:
             print(f"❌ Failed to initialize Spotify API client: {e}")
             self.sp = None
 
+    def _fetch_playlist_tracks(self, playlist_ids: List[str], limit: int,
+                               market: str) -> List[Dict]:
+        """
+        Fetch track pages for several playlists concurrently.
+
+        Args:
+            playlist_ids: Spotify playlist IDs
+            limit: Number of tracks to fetch per playlist
+            market: Country market code
+
+        Returns:
+            List of playlist track responses, in the same order as playlist_ids
+        """
+        return list(_playlist_executor.map(
+            lambda playlist_id: self.sp.playlist_tracks(playlist_id, limit=limit, market=market),
+            playlist_ids
+        ))
+
     def get_top_tracks_by_genre(self, genre: str = 'pop', limit: int = 50,
                                market: str = 'US') -> List[Dict]:
         """
@@ -48,33 +112,32 @@ class SpotifyDataFetcher:
             query = f"{genre} top tracks"
             results = self.sp.search(q=query, type='playlist', limit=5, market=market)
 
-            tracks = []
-            for playlist in results['playlists']['items']:
-                if playlist:
-                    playlist_tracks = self.sp.playlist_tracks(
-                        playlist['id'], limit=min(limit//5, 10), market=market
-                    )
-
-                    for item in playlist_tracks['items']:
-                        if item and item['track']:
-                            track = item['track']
-                            track_data = {
-                                'platform': 'spotify',
-                                'track_id': track['id'],
-                                'track_name': track['name'],
-                                'artist': track['artists'][0]['name'] if track['artists'] else 'Unknown',
-                                'album': track['album']['name'] if track['album'] else 'Unknown',
-                                'genre': genre,
-                                'popularity': track['popularity'],
-                                'duration_ms': track['duration_ms'],
-                                'external_url': track['external_urls']['spotify'],
-                                'release_date': track['album']['release_date'] if track['album'] else None,
-                                'market': market,
-                                'fetched_at': pd.Timestamp.now()
-                            }
-                            tracks.append(track_data)
-
-            return tracks[:limit]
+            playlist_ids = [playlist['id'] for playlist in results['playlists']['items'] if playlist]
+            playlist_pages = self._fetch_playlist_tracks(
+                playlist_ids, limit=min(limit//5, 10), market=market
+            )
+
+            # Build rows lazily so nothing past the limit is constructed
+            fetched_at = pd.Timestamp.now(tz='UTC').value
+            tracks = (
+                {
+                    'platform': 'spotify',
+                    'track_id': track['id'],
+                    'track_name': track['name'],
+                    'artist': track['artists'][0]['name'] if track['artists'] else 'Unknown',
+                    'album': track['album']['name'] if track['album'] else 'Unknown',
+                    'genre': genre,
+                    'popularity': track['popularity'],
+                    'duration_ms': track['duration_ms'],
+                    'external_url': track['external_urls']['spotify'],
+                    'release_date': track['album']['release_date'] if track['album'] else None,
+                    'market': market,
+                    'fetched_at': fetched_at
+                }
+                for track in _iter_tracks(playlist_pages)
+            )
+
+            return list(islice(tracks, limit))
 
         except Exception as e:
             print(f"❌ Error fetching Spotify tracks for genre {genre}: {e}")
@@ -107,7 +170,7 @@ class SpotifyDataFetcher:
                     'followers': artist['followers']['total'],
                     'genres': artist['genres'],
                     'market': market,
-                    'fetched_at': pd.Timestamp.now()
+                    'fetched_at': pd.Timestamp.now(tz='UTC').value
                 }
 
         except Exception as e:
@@ -119,48 +182,64 @@ class SpotifyDataFetcher:
         """
         Fetch currently trending/popular tracks.
 
+        Successful results are cached per (limit, market) for 5 minutes so
+        concurrent sessions and rapid filter changes share a single API round
+        trip; failures are not cached, so the next call retries.
+
         Args:
             limit: Number of tracks to fetch
             market: Country market code
 
         Returns:
-            List of trending track dictionaries
+            List of trending track dictionaries (copies, so callers may modify them)
         """
         if not self.sp:
             return []
 
         try:
-            # Get tracks from Spotify's "Top 50" playlists or similar
-            results = self.sp.search(q="Top 50", type='playlist', limit=5, market=market)
-
-            tracks = []
-            for playlist in results['playlists']['items']:
-                if playlist and 'Top' in playlist['name']:
-                    playlist_tracks = self.sp.playlist_tracks(
-                        playlist['id'], limit=min(limit//5, 10), market=market
-                    )
-
-                    for item in playlist_tracks['items']:
-                        if item and item['track']:
-                            track = item['track']
-                            track_data = {
-                                'platform': 'spotify',
-                                'track_id': track['id'],
-                                'track_name': track['name'],
-                                'artist': track['artists'][0]['name'] if track['artists'] else 'Unknown',
-                                'popularity': track['popularity'],
-                                'duration_ms': track['duration_ms'],
-                                'external_url': track['external_urls']['spotify'],
-                                'market': market,
-                                'fetched_at': pd.Timestamp.now()
-                            }
-                            tracks.append(track_data)
-
-            return tracks[:limit]
-
+            return [dict(track) for track in self._fetch_trending_tracks(limit, market)]
         except Exception as e:
             print(f"❌ Error fetching trending tracks: {e}")
             return []
 
-# Global instance for easy access
-spotify_fetcher = SpotifyDataFetcher()
+    @ttl_cache(maxsize=32, ttl=300)
+    def _fetch_trending_tracks(self, limit: int, market: str) -> List[Dict]:
+        """Fetch trending tracks, raising on API errors so they are never cached."""
+        # Get tracks from Spotify's "Top 50" playlists or similar
+        results = self.sp.search(q="Top 50", type='playlist', limit=5, market=market)
+
+        playlist_ids = [playlist['id'] for playlist in results['playlists']['items']
+                        if playlist and 'Top' in playlist['name']]
+        playlist_pages = self._fetch_playlist_tracks(
+            playlist_ids, limit=min(limit//5, 10), market=market
+        )
+
+        # Build rows lazily so nothing past the limit is constructed
+        fetched_at = pd.Timestamp.now(tz='UTC').value
+        tracks = (
+            {
+                'platform': 'spotify',
+                'track_id': track['id'],
+                'track_name': track['name'],
+                'artist': track['artists'][0]['name'] if track['artists'] else 'Unknown',
+                'popularity': track['popularity'],
+                'duration_ms': track['duration_ms'],
+                'external_url': track['external_urls']['spotify'],
+                'market': market,
+                'fetched_at': fetched_at
+            }
+            for track in _iter_tracks(playlist_pages)
+        )
+
+        return list(islice(tracks, limit))
+
+@lru_cache(maxsize=1)
+def get_spotify_fetcher() -> SpotifyDataFetcher:
+    """Create the shared Spotify fetcher on first use instead of at import time."""
+    return SpotifyDataFetcher()
+
+def __getattr__(name):
+    """Resolve the module-level ``spotify_fetcher`` instance lazily (PEP 562)."""
+    if name == 'spotify_fetcher':
+        return get_spotify_fetcher()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
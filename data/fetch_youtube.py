@@ -2,13 +2,159 @@
 YouTube API data fetching module.
 Handles authentication, data retrieval, and processing for YouTube trending content.
 """
+import asyncio
+import json
+import threading
 import time
+import aiohttp
+import httplib2
 import requests
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Tuple
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from cachetools.func import ttl_cache
+import numpy as np
 import pandas as pd
-from config.api_keys import api_keys
+from functools import lru_cache
+from config.api_keys import get_api_keys
+
+try:
+    import redis
+except ImportError:  # Redis is optional; the disk cache is used without it
+    redis = None
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+YOUTUBE_VIDEOS_URL = 'https://www.googleapis.com/youtube/v3/videos'
+
+# The Data API accepts up to 50 comma-separated ids per videos/channels lookup
+YOUTUBE_BATCH_SIZE = 50
+
+# httplib2.Http is not thread-safe, so each fetch thread keeps its own pooled instance
+_http_local = threading.local()
+
+def _get_http() -> httplib2.Http:
+    """
+    Get this thread's persistent HTTP transport.
+
+    Returns:
+        httplib2.Http that keeps its TLS connection to the API open between
+        requests and revalidates cached responses with ETags
+    """
+    http = getattr(_http_local, 'http', None)
+    if http is None:
+        http = httplib2.Http(cache=get_api_keys().youtube_http_cache_dir, timeout=10)
+        _http_local.http = http
+    return http
+
+def _count_column(statistics: List[Dict], field: str) -> np.ndarray:
+    """Parse one statistics count field of every video into an int64 array (missing counts become 0)."""
+    counts = pd.to_numeric([stats.get(field) for stats in statistics], errors='coerce')
+    return np.nan_to_num(counts, nan=0).astype(np.int64)
+
+def _build_trending_frame(response: Dict, region_code: str, fetched_at: int) -> pd.DataFrame:
+    """
+    Convert a mostPopular videos().list response into a DataFrame.
+
+    Columns are built directly from the response items rather than via
+    one dictionary per video.
+
+    Args:
+        response: Raw API response
+        region_code: Region the response was fetched for
+        fetched_at: UTC epoch time in nanoseconds the response was fetched
+
+    Returns:
+        DataFrame with one row of metadata per trending video
+    """
+    items = response.get('items', [])
+    snippets = [item.get('snippet', {}) for item in items]
+    statistics = [item.get('statistics', {}) for item in items]
+    video_ids = [item['id'] for item in items]
+
+    return pd.DataFrame({
+        'platform': 'youtube',
+        'video_id': video_ids,
+        'title': [snippet.get('title', '') for snippet in snippets],
+        'channel_title': [snippet.get('channelTitle', '') for snippet in snippets],
+        'description': [snippet.get('description', '') for snippet in snippets],
+        'published_at': [snippet.get('publishedAt', '') for snippet in snippets],
+        'category_id': [snippet.get('categoryId', '') for snippet in snippets],
+        'tags': [snippet.get('tags', []) for snippet in snippets],
+        'view_count': _count_column(statistics, 'viewCount'),
+        'like_count': _count_column(statistics, 'likeCount'),
+        'comment_count': _count_column(statistics, 'commentCount'),
+        'duration': [item.get('contentDetails', {}).get('duration', '') for item in items],
+        'region_code': region_code,
+        'thumbnail_url': [snippet.get('thumbnails', {}).get('default', {}).get('url', '')
+                          for snippet in snippets],
+        'video_url': [f"https://www.youtube.com/watch?v={video_id}" for video_id in video_ids],
+        'fetched_at': fetched_at
+    })
+
+def _chunked(ids: List[str], size: int = YOUTUBE_BATCH_SIZE) -> List[List[str]]:
+    """Split ids into consecutive chunks of at most size ids."""
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+class ResponseCache:
+    """TTL cache for raw YouTube API responses, backed by Redis or a local disk cache."""
+
+    def __init__(self, ttl: int, redis_url: Optional[str] = None, cache_dir: str = '.yt_cache'):
+        """
+        Connect to the cache backend.
+
+        Args:
+            ttl: Seconds a cached response stays fresh
+            redis_url: Redis connection URL; the disk cache is used when unset or unreachable
+            cache_dir: Directory for the disk cache
+        """
+        self.ttl = ttl
+        self._redis = None
+        self._disk = None
+
+        if redis_url and redis is not None:
+            try:
+                client = redis.Redis.from_url(redis_url)
+                client.ping()
+                self._redis = client
+            except Exception as e:
+                print(f"⚠️  Redis unavailable, using disk cache instead: {e}")
+
+        if self._redis is None and diskcache is not None:
+            self._disk = diskcache.Cache(cache_dir)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if missing, expired or unreadable."""
+        try:
+            if self._redis is not None:
+                cached = self._redis.get(key)
+                return json.loads(cached) if cached is not None else None
+            if self._disk is not None:
+                return self._disk.get(key)
+        except Exception as e:
+            print(f"⚠️  Cache read failed for {key}: {e}")
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value under key for the configured TTL."""
+        try:
+            if self._redis is not None:
+                self._redis.setex(key, self.ttl, json.dumps(value))
+            elif self._disk is not None:
+                self._disk.set(key, value, expire=self.ttl)
+        except Exception as e:
+            print(f"⚠️  Cache write failed for {key}: {e}")
+
+@lru_cache(maxsize=1)
+def get_response_cache() -> Optional[ResponseCache]:
+    """Create the shared YouTube response cache, or None when caching is disabled."""
+    api_keys = get_api_keys()
+    if api_keys.youtube_cache_ttl <= 0:
+        return None
+    return ResponseCache(api_keys.youtube_cache_ttl, api_keys.redis_url, api_keys.youtube_cache_dir)
 
 class YouTubeDataFetcher:
     """Class to handle YouTube API data fetching and processing."""
@@ -16,76 +162,166 @@ class YouTubeDataFetcher:
     def __init__(self):
         """Initialize YouTube API client."""
         try:
-            self.youtube = build('youtube', 'v3', developerKey=api_keys.youtube_api_key)
+            self.youtube = build('youtube', 'v3', developerKey=get_api_keys().youtube_api_key,
+                                 http=_get_http())
             print("✅ YouTube API client initialized successfully!")
         except Exception as e:
             print(f"❌ Failed to initialize YouTube API client: {e}")
             self.youtube = None
 
+        self.response_cache = get_response_cache()
+
+    def _execute_cached(self, key: str, request) -> Tuple[Dict, int]:
+        """
+        Execute an API request, reusing a fresh cached response when available.
+
+        Args:
+            key: Cache key identifying the request arguments
+            request: Unexecuted googleapiclient request
+
+        Returns:
+            Tuple of (response, fetched_at) where fetched_at is the UTC epoch
+            time in nanoseconds at which the response was fetched
+        """
+        if self.response_cache is not None:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                return cached['response'], cached['fetched_at']
+
+        response = request.execute(http=_get_http())
+        fetched_at = pd.Timestamp.now(tz='UTC').value
+
+        if self.response_cache is not None:
+            self.response_cache.set(key, {'response': response, 'fetched_at': fetched_at})
+
+        return response, fetched_at
+
     def get_trending_videos(self, region_code: str = 'US', max_results: int = 50,
-                           category_id: Optional[str] = None) -> List[Dict]:
+                           category_id: Optional[str] = None) -> pd.DataFrame:
         """
         Fetch trending videos from YouTube.
 
+        Successful results are cached per (region_code, max_results,
+        category_id) for 5 minutes so concurrent sessions share a single API
+        round trip; failures are not cached, so the next call retries.
+
         Args:
             region_code: Region code (e.g., 'US', 'GB', 'DE')
             max_results: Maximum number of videos to fetch (max 50)
             category_id: Video category ID for filtering
 
         Returns:
-            List of trending video dictionaries with metadata
+            DataFrame of trending videos with metadata (empty on failure); a copy,
+            so callers may modify it
         """
         if not self.youtube:
-            return []
+            return pd.DataFrame()
 
         try:
-            request = self.youtube.videos().list(
-                part='snippet,statistics,contentDetails',
-                chart='mostPopular',
-                regionCode=region_code,
-                maxResults=min(max_results, 50),
-                videoCategoryId=category_id
-            )
+            return self._fetch_trending_videos(region_code, max_results, category_id).copy()
+        except HttpError as e:
+            print(f"❌ YouTube API error: {e}")
+            return pd.DataFrame()
+        except Exception as e:
+            print(f"❌ Error fetching YouTube trending videos: {e}")
+            return pd.DataFrame()
+
+    @ttl_cache(maxsize=32, ttl=300)
+    def _fetch_trending_videos(self, region_code: str, max_results: int,
+                               category_id: Optional[str]) -> pd.DataFrame:
+        """Fetch trending videos, raising on API errors so they are never cached."""
+        request = self.youtube.videos().list(
+            part='snippet,statistics,contentDetails',
+            chart='mostPopular',
+            regionCode=region_code,
+            maxResults=min(max_results, 50),
+            videoCategoryId=category_id
+        )
+
+        response, fetched_at = self._execute_cached(
+            f"yt:trending:{region_code}:{max_results}:{category_id}", request
+        )
+
+        return _build_trending_frame(response, region_code, fetched_at)
+
+    async def _fetch_trending_region(self, session: aiohttp.ClientSession, region_code: str,
+                                     max_results: int, category_id: Optional[str]) -> pd.DataFrame:
+        """
+        Fetch trending videos for one region over the REST endpoint.
 
-            response = request.execute()
+        Args:
+            session: Shared aiohttp session
+            region_code: Region code
+            max_results: Maximum number of videos to fetch (max 50)
+            category_id: Video category ID for filtering
 
-            videos = []
-            for item in response.get('items', []):
-                snippet = item.get('snippet', {})
-                statistics = item.get('statistics', {})
-                content_details = item.get('contentDetails', {})
+        Returns:
+            DataFrame of trending videos with metadata (empty on failure)
+        """
+        key = f"yt:trending:{region_code}:{max_results}:{category_id}"
+        cached = self.response_cache.get(key) if self.response_cache is not None else None
+        if cached is not None:
+            return _build_trending_frame(cached['response'], region_code, cached['fetched_at'])
+
+        params = {
+            'part': 'snippet,statistics,contentDetails',
+            'chart': 'mostPopular',
+            'regionCode': region_code,
+            'maxResults': min(max_results, 50),
+            'key': get_api_keys().youtube_api_key
+        }
+        if category_id is not None:
+            params['videoCategoryId'] = category_id
 
-                video_data = {
-                    'platform': 'youtube',
-                    'video_id': item['id'],
-                    'title': snippet.get('title', ''),
-                    'channel_title': snippet.get('channelTitle', ''),
-                    'description': snippet.get('description', ''),
-                    'published_at': snippet.get('publishedAt', ''),
-                    'category_id': snippet.get('categoryId', ''),
-                    'tags': snippet.get('tags', []),
-                    'view_count': int(statistics.get('viewCount', 0)),
-                    'like_count': int(statistics.get('likeCount', 0)),
-                    'comment_count': int(statistics.get('commentCount', 0)),
-                    'duration': content_details.get('duration', ''),
-                    'region_code': region_code,
-                    'thumbnail_url': snippet.get('thumbnails', {}).get('default', {}).get('url', ''),
-                    'video_url': f"https://www.youtube.com/watch?v={item['id']}",
-                    'fetched_at': pd.Timestamp.now()
-                }
-                videos.append(video_data)
+        try:
+            async with session.get(YOUTUBE_VIDEOS_URL, params=params) as resp:
+                resp.raise_for_status()
+                response = await resp.json()
+        except Exception as e:
+            print(f"❌ Error fetching YouTube trending videos for {region_code}: {e}")
+            return pd.DataFrame()
+
+        fetched_at = pd.Timestamp.now(tz='UTC').value
+        if self.response_cache is not None:
+            self.response_cache.set(key, {'response': response, 'fetched_at': fetched_at})
+
+        return _build_trending_frame(response, region_code, fetched_at)
+
+    async def _get_trending_videos_multi_async(self, regions: List[str], max_results: int,
+                                               category_id: Optional[str]) -> List[pd.DataFrame]:
+        """Fetch trending videos for all regions concurrently over one pooled session."""
+        connector = aiohttp.TCPConnector(limit=20)
+        timeout = aiohttp.ClientTimeout(total=10)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            return await asyncio.gather(*(
+                self._fetch_trending_region(session, region_code, max_results, category_id)
+                for region_code in regions
+            ))
+
+    def get_trending_videos_multi(self, regions: List[str], max_results: int = 50,
+                                  category_id: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Fetch trending videos for several regions at once.
 
-            return videos
+        The requests are issued concurrently, so N regions take about as long
+        as one. Must not be called from inside a running event loop.
 
-        except HttpError as e:
-            print(f"❌ YouTube API error: {e}")
-            return []
-        except Exception as e:
-            print(f"❌ Error fetching YouTube trending videos: {e}")
-            return []
+        Args:
+            regions: Region codes (e.g., ['US', 'GB', 'DE'])
+            max_results: Maximum number of videos to fetch per region (max 50)
+            category_id: Video category ID for filtering
+
+        Returns:
+            Dictionary mapping region code to its DataFrame of trending videos
+        """
+        if not self.youtube:
+            return {region_code: pd.DataFrame() for region_code in regions}
+
+        results = asyncio.run(self._get_trending_videos_multi_async(regions, max_results, category_id))
+        return dict(zip(regions, results))
 
     def search_videos(self, query: str, max_results: int = 25,
-                     order: str = 'relevance', region_code: str = 'US') -> List[Dict]:
+                     order: str = 'relevance', region_code: str = 'US') -> pd.DataFrame:
         """
         Search for videos based on a query.
 
@@ -96,10 +332,10 @@ class YouTubeDataFetcher:
             region_code: Region code for search
 
         Returns:
-            List of video dictionaries matching the search query
+            DataFrame of videos matching the search query (empty on failure)
         """
         if not self.youtube:
-            return []
+            return pd.DataFrame()
 
         try:
             request = self.youtube.search().list(
@@ -111,99 +347,156 @@ class YouTubeDataFetcher:
                 maxResults=min(max_results, 50)
             )
 
-            response = request.execute()
+            response, fetched_at = self._execute_cached(
+                f"yt:search:{query}:{max_results}:{order}:{region_code}", request
+            )
 
             video_ids = [item['id']['videoId'] for item in response.get('items', [])
                         if item['id']['kind'] == 'youtube#video']
 
             # Get detailed statistics for the videos
             if video_ids:
-                stats_request = self.youtube.videos().list(
-                    part='statistics,contentDetails',
-                    id=','.join(video_ids)
-                )
-                stats_response = stats_request.execute()
+                stats_by_id = self.get_video_stats_batch(video_ids)
 
-                videos = []
-                for item, stats_item in zip(response.get('items', []), stats_response.get('items', [])):
-                    snippet = item.get('snippet', {})
-                    statistics = stats_item.get('statistics', {})
-                    content_details = stats_item.get('contentDetails', {})
+                # Keep search results that have stats, in search order
+                items = [item for item in response.get('items', [])
+                         if item['id']['kind'] == 'youtube#video' and item['id']['videoId'] in stats_by_id]
+                snippets = [item.get('snippet', {}) for item in items]
+                video_ids = [item['id']['videoId'] for item in items]
+                details = [stats_by_id[video_id] for video_id in video_ids]
+                statistics = [detail.get('statistics', {}) for detail in details]
 
-                    video_data = {
-                        'platform': 'youtube',
-                        'video_id': item['id']['videoId'],
-                        'title': snippet.get('title', ''),
-                        'channel_title': snippet.get('channelTitle', ''),
-                        'description': snippet.get('description', ''),
-                        'published_at': snippet.get('publishedAt', ''),
-                        'view_count': int(statistics.get('viewCount', 0)),
-                        'like_count': int(statistics.get('likeCount', 0)),
-                        'comment_count': int(statistics.get('commentCount', 0)),
-                        'duration': content_details.get('duration', ''),
-                        'region_code': region_code,
-                        'thumbnail_url': snippet.get('thumbnails', {}).get('default', {}).get('url', ''),
-                        'video_url': f"https://www.youtube.com/watch?v={item['id']['videoId']}",
-                        'fetched_at': pd.Timestamp.now()
-                    }
-                    videos.append(video_data)
-
-                return videos
+                return pd.DataFrame({
+                    'platform': 'youtube',
+                    'video_id': video_ids,
+                    'title': [snippet.get('title', '') for snippet in snippets],
+                    'channel_title': [snippet.get('channelTitle', '') for snippet in snippets],
+                    'description': [snippet.get('description', '') for snippet in snippets],
+                    'published_at': [snippet.get('publishedAt', '') for snippet in snippets],
+                    'view_count': _count_column(statistics, 'viewCount'),
+                    'like_count': _count_column(statistics, 'likeCount'),
+                    'comment_count': _count_column(statistics, 'commentCount'),
+                    'duration': [detail.get('contentDetails', {}).get('duration', '') for detail in details],
+                    'region_code': region_code,
+                    'thumbnail_url': [snippet.get('thumbnails', {}).get('default', {}).get('url', '')
+                                      for snippet in snippets],
+                    'video_url': [f"https://www.youtube.com/watch?v={video_id}" for video_id in video_ids],
+                    'fetched_at': fetched_at
+                })
 
         except HttpError as e:
             print(f"❌ YouTube API error: {e}")
-            return []
+            return pd.DataFrame()
         except Exception as e:
             print(f"❌ Error searching YouTube videos: {e}")
-            return []
+            return pd.DataFrame()
 
-        return []
+        return pd.DataFrame()
 
-    def get_channel_stats(self, channel_id: str) -> Optional[Dict]:
+    def get_video_stats_batch(self, video_ids: List[str]) -> Dict[str, Dict]:
         """
-        Get statistics for a specific YouTube channel.
+        Get statistics and content details for many videos.
+
+        Ids are looked up in chunks of 50, one request per chunk.
 
         Args:
-            channel_id: YouTube channel ID
+            video_ids: YouTube video IDs
 
         Returns:
-            Dictionary with channel statistics
+            Dictionary mapping video ID to its videos().list item; videos
+            that are missing or private are left out
         """
         if not self.youtube:
-            return None
+            return {}
 
+        stats_by_id = {}
         try:
-            request = self.youtube.channels().list(
-                part='snippet,statistics',
-                id=channel_id
-            )
+            for chunk in _chunked(video_ids):
+                request = self.youtube.videos().list(
+                    part='statistics,contentDetails',
+                    id=','.join(chunk)
+                )
+                response, _ = self._execute_cached(f"yt:videos:{','.join(chunk)}", request)
 
-            response = request.execute()
+                for item in response.get('items', []):
+                    stats_by_id[item['id']] = item
 
-            if response.get('items'):
-                channel = response['items'][0]
-                snippet = channel.get('snippet', {})
-                statistics = channel.get('statistics', {})
+        except HttpError as e:
+            print(f"❌ YouTube API error: {e}")
+        except Exception as e:
+            print(f"❌ Error fetching video stats: {e}")
 
-                return {
-                    'platform': 'youtube',
-                    'channel_id': channel_id,
-                    'channel_title': snippet.get('title', ''),
-                    'description': snippet.get('description', ''),
-                    'subscriber_count': int(statistics.get('subscriberCount', 0)),
-                    'video_count': int(statistics.get('videoCount', 0)),
-                    'view_count': int(statistics.get('viewCount', 0)),
-                    'published_at': snippet.get('publishedAt', ''),
-                    'country': snippet.get('country', ''),
-                    'fetched_at': pd.Timestamp.now()
-                }
+        return stats_by_id
+
+    def get_channel_stats_batch(self, channel_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Get statistics for many YouTube channels.
+
+        Ids are looked up in chunks of 50, one request per chunk.
+
+        Args:
+            channel_ids: YouTube channel IDs
+
+        Returns:
+            Dictionary mapping channel ID to its channel statistics; channels
+            that are not found are left out
+        """
+        if not self.youtube:
+            return {}
+
+        channels = {}
+        try:
+            for chunk in _chunked(channel_ids):
+                request = self.youtube.channels().list(
+                    part='snippet,statistics',
+                    id=','.join(chunk),
+                    maxResults=YOUTUBE_BATCH_SIZE
+                )
+                response, fetched_at = self._execute_cached(f"yt:channels:{','.join(chunk)}", request)
+
+                for channel in response.get('items', []):
+                    snippet = channel.get('snippet', {})
+                    statistics = channel.get('statistics', {})
+
+                    channels[channel['id']] = {
+                        'platform': 'youtube',
+                        'channel_id': channel['id'],
+                        'channel_title': snippet.get('title', ''),
+                        'description': snippet.get('description', ''),
+                        'subscriber_count': int(statistics.get('subscriberCount', 0)),
+                        'video_count': int(statistics.get('videoCount', 0)),
+                        'view_count': int(statistics.get('viewCount', 0)),
+                        'published_at': snippet.get('publishedAt', ''),
+                        'country': snippet.get('country', ''),
+                        'fetched_at': fetched_at
+                    }
 
         except HttpError as e:
             print(f"❌ YouTube API error: {e}")
         except Exception as e:
-            print(f"❌ Error fetching channel stats for {channel_id}: {e}")
+            print(f"❌ Error fetching channel stats: {e}")
 
-        return None
+        return channels
+
+    def get_channel_stats(self, channel_id: str) -> Optional[Dict]:
+        """
+        Get statistics for a specific YouTube channel.
 
-# Global instance for easy access
-youtube_fetcher = YouTubeDataFetcher()
+        Args:
+            channel_id: YouTube channel ID
+
+        Returns:
+            Dictionary with channel statistics
+        """
+        return self.get_channel_stats_batch([channel_id]).get(channel_id)
+
+@lru_cache(maxsize=1)
+def get_youtube_fetcher() -> YouTubeDataFetcher:
+    """Create the shared YouTube fetcher on first use instead of at import time."""
+    return YouTubeDataFetcher()
+
+def __getattr__(name):
+    """Resolve the module-level ``youtube_fetcher`` instance lazily (PEP 562)."""
+    if name == 'youtube_fetcher':
+        return get_youtube_fetcher()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
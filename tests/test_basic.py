@@ -2,13 +2,27 @@
 Basic tests for critical components of the Spotify-YouTube Trend Analysis Dashboard.
 """
 import pytest
+import numpy as np
 import pandas as pd
 from unittest.mock import Mock, patch
 
 # Test imports
 from config.api_keys import api_keys
-from utils.helpers import format_number, calculate_engagement_rate, parse_duration
-from utils.preprocess import clean_spotify_data, clean_youtube_data
+from utils.helpers import (
+    format_number, format_number_series, calculate_engagement_rate, calculate_engagement_rates,
+    parse_duration, parse_duration_series, format_duration, format_duration_array,
+    calculate_trend_metrics, get_top_content_by_metric
+)
+from utils.preprocess import clean_all, clean_spotify_data, clean_youtube_data
+
+@pytest.fixture(autouse=True)
+def no_youtube_disk_caches(monkeypatch):
+    """Keep YouTube fetchers built in tests off the on-disk response and HTTP caches."""
+    import httplib2
+    import data.fetch_youtube as fetch_youtube
+
+    monkeypatch.setattr(fetch_youtube, 'get_response_cache', lambda: None)
+    monkeypatch.setattr(fetch_youtube, '_get_http', lambda: httplib2.Http(timeout=10))
 
 class TestAPIKeys:
     """Test API key configuration."""
@@ -33,18 +47,137 @@ class TestHelpers:
         assert format_number(1000000000) == "1.0B"
         assert format_number(500) == "500"
 
+    def test_format_number_series(self):
+        """Test vectorized number formatting matches the scalar formatter."""
+        values = [500, 1500, 2500000, 1000000000, 999.9, 0]
+
+        assert list(format_number_series(values)) == [format_number(v) for v in values]
+        assert list(format_number_series([np.nan])) == ['N/A']
+
     def test_calculate_engagement_rate(self):
         """Test engagement rate calculation."""
         assert calculate_engagement_rate(100, 1000) == 10.0
         assert calculate_engagement_rate(0, 1000) == 0.0
         assert calculate_engagement_rate(50, 0) == 0.0
 
+    def test_calculate_engagement_rates(self):
+        """Test vectorized engagement rates match the scalar version on small and large inputs."""
+        assert list(calculate_engagement_rates([100, 0, 50], [1000, 1000, 0])) == [10.0, 0.0, 0.0]
+
+        views = np.arange(20_000, dtype=np.int64)
+        likes = views // 10
+        expected = [calculate_engagement_rate(l, v) for l, v in zip(likes[:100], views[:100])]
+        assert np.allclose(calculate_engagement_rates(likes, views)[:100], expected)
+
+    def test_calculate_engagement_rates_kernel_failure(self, monkeypatch):
+        """Test large inputs fall back to NumPy when the Numba kernel cannot run."""
+        import utils.helpers as helpers
+
+        def failing_kernel(likes, views, out):
+            raise ValueError('No threading layer could be loaded.')
+
+        monkeypatch.setattr(helpers, '_engagement_rates_kernel', failing_kernel, raising=False)
+
+        views = np.arange(20_000, dtype=np.int64)
+        rates = calculate_engagement_rates(views // 10, views)
+
+        assert rates[0] == 0.0
+        assert np.allclose(rates[1:], (views[1:] // 10) / views[1:] * 100.0)
+
     def test_parse_duration(self):
         """Test YouTube duration parsing."""
         assert parse_duration("PT4M13S") == 253
         assert parse_duration("PT1H30M45S") == 5445
         assert parse_duration("PT30S") == 30
+        assert parse_duration("P1DT2H") == 93600
+        assert parse_duration("P0D") == 0
         assert parse_duration("") == 0
+        assert parse_duration("4M13S") == 0
+        assert parse_duration(None) == 0
+        assert parse_duration(float('nan')) == 0
+
+    def test_parse_duration_series(self):
+        """Test vectorized duration parsing matches the scalar parser."""
+        durations = pd.Series(["PT4M13S", "PT1H30M45S", "P1DT2H", "", None, "bad"])
+
+        seconds = parse_duration_series(durations)
+
+        assert seconds.dtype == 'int32'
+        assert list(seconds) == [parse_duration(d) for d in durations]
+
+        for non_strings in (pd.Series([1, 2]), pd.Series([np.nan, np.nan]), pd.Series(["PT30S", 5], dtype=object)):
+            seconds = parse_duration_series(non_strings)
+            assert seconds.dtype == 'int32'
+            assert list(seconds) == [parse_duration(d) for d in non_strings]
+
+    def test_format_duration_array(self):
+        """Test vectorized duration formatting matches the scalar formatter."""
+        seconds = [0, 5, 253, 3600, 5445, 93600]
+
+        assert list(format_duration_array(seconds)) == [format_duration(s) for s in seconds]
+        assert list(format_duration_array(seconds[:3])) == ['0:00', '0:05', '4:13']
+        assert list(format_duration_array(5445)) == [format_duration(5445)]
+        assert list(format_duration_array(np.int64(253))) == [format_duration(253)]
+
+    def test_calculate_trend_metrics(self):
+        """Test trend metrics over unsorted time-series data."""
+        df = pd.DataFrame({
+            'fetched_at': [3, 1, 2],
+            'engagement_score': [10, 50, 30],
+            'creator': ['A', 'A', 'B']
+        })
+
+        metrics = calculate_trend_metrics(df)
+
+        assert metrics['date_range'] == {'start': 1, 'end': 3}
+        assert metrics['avg_engagement'] == 30
+        assert metrics['max_engagement'] == 50
+        assert metrics['unique_creators'] == 2
+        dates_only = calculate_trend_metrics(df[['fetched_at']])
+        assert np.isnan(dates_only['avg_engagement'])
+        assert dates_only['unique_creators'] == 0
+
+    def test_get_top_content_by_metric(self):
+        """Test top content matches nlargest, including ties and missing values."""
+        df = pd.DataFrame({
+            'content_title': list('ABCDEFGH'),
+            'engagement_score': [5, np.nan, 9, 5, 1, 9, 5, np.nan]
+        })
+
+        top = get_top_content_by_metric(df, 'engagement_score', 4)
+
+        assert list(top['content_title']) == ['C', 'F', 'A', 'D']
+        assert top.equals(df.nlargest(4, 'engagement_score').reset_index(drop=True))
+
+    def test_get_top_content_by_metric_edge_n(self):
+        """Test n of zero or negative and every cut-off through a run of ties match nlargest."""
+        df = pd.DataFrame({
+            'content_title': list('ABCDEFGHIJ'),
+            'engagement_score': [3, 7, 7, 1, 7, 3, 9, 7, 0, 3]
+        })
+
+        assert get_top_content_by_metric(df, 'engagement_score', 0).empty
+        for n in range(-2, 10):
+            top = get_top_content_by_metric(df, 'engagement_score', n)
+            assert top.equals(df.nlargest(n, 'engagement_score').reset_index(drop=True))
+
+    def test_get_top_content_by_metric_polars(self, monkeypatch):
+        """Test the polars top-k path matches nlargest, including ties, missing values and n=0."""
+        pytest.importorskip('polars')
+        import utils.helpers as helpers
+        monkeypatch.setattr(helpers, 'POLARS_MIN_ROWS', 0)
+
+        frames = [
+            pd.DataFrame({'content_title': list('ABCDEFGH'),
+                          'engagement_score': [5, np.nan, 9, 5, 1, 9, 5, np.nan]}),
+            pd.DataFrame({'content_title': list('ABCDEFGHIJ'),
+                          'engagement_score': [3, 7, 7, 1, 7, 3, 9, 7, 0, 3]})
+        ]
+
+        for df in frames:
+            for n in range(0, len(df) + 1):
+                top = get_top_content_by_metric(df, 'engagement_score', n)
+                assert top.equals(df.nlargest(n, 'engagement_score').reset_index(drop=True))
 
 class TestDataPreprocessing:
     """Test data preprocessing functions."""
@@ -55,16 +188,44 @@ class TestDataPreprocessing:
             'track_name': ['Song 1', 'Song 2'],
             'artist': ['Artist 1', None],
             'popularity': [80, 90],
-            'genre': ['pop', None]
+            'genre': ['pop', None],
+            'release_date': ['2023', '2023-05-06']
         }
         df = pd.DataFrame(data)
 
         cleaned = clean_spotify_data(df)
 
         assert 'popularity_norm' in cleaned.columns
-        assert cleaned['popularity_norm'].iloc[0] == 0.8
+        assert cleaned['popularity_norm'].dtype == np.float32
+        assert cleaned['popularity_norm'].iloc[0] == pytest.approx(0.8)
+        assert cleaned['popularity'].dtype == np.uint8
         assert cleaned['artist'].iloc[1] == 'Unknown'
-        assert cleaned['genre'].iloc[1] == 'Unknown'
+        assert cleaned['genre'].iloc[1] == 'unknown'
+        assert set(cleaned['genre'].cat.categories) == {'pop', 'unknown'}
+        assert list(cleaned['release_date']) == [pd.Timestamp('2023-01-01'), pd.Timestamp('2023-05-06')]
+
+    def test_clean_labels_categorical(self):
+        """Test genre/category labels are lowercased categoricals that survive merging."""
+        from utils.helpers import merge_platform_data
+
+        spotify = clean_spotify_data(pd.DataFrame({
+            'track_name': ['Song 1', 'Song 2'], 'artist': ['A', 'B'],
+            'popularity': [80, 90], 'genre': ['Pop', 'ROCK'], 'fetched_at': [1, 2]
+        }))
+        youtube = clean_youtube_data(pd.DataFrame({
+            'title': ['Video 1'], 'channel_title': ['C'], 'view_count': [10],
+            'like_count': [1], 'category_id': ['10'], 'fetched_at': [3]
+        }))
+
+        assert isinstance(spotify['genre'].dtype, pd.CategoricalDtype)
+        assert list(spotify['genre']) == ['pop', 'rock']
+
+        combined = merge_platform_data(spotify, youtube)
+        assert isinstance(combined['category'].dtype, pd.CategoricalDtype)
+        assert list(combined['category']) == ['pop', 'rock', '10']
+        assert isinstance(combined['platform'].dtype, pd.CategoricalDtype)
+        assert list(combined['platform']) == ['Spotify', 'Spotify', 'YouTube']
+        assert combined['creator'].dtype == 'string[pyarrow]'
 
     def test_clean_youtube_data(self):
         """Test YouTube data cleaning."""
@@ -81,8 +242,24 @@ class TestDataPreprocessing:
 
         assert 'view_count_norm' in cleaned.columns
         assert 'like_count_norm' in cleaned.columns
+        assert cleaned['view_count_norm'].dtype == np.float32
+        assert list(cleaned['like_count_norm']) == [0.5, 1.0]
+        assert cleaned['view_count'].dtype == np.uint16
         assert pd.api.types.is_datetime64_any_dtype(cleaned['published_at'])
+        assert cleaned['published_at'].iloc[1] == pd.Timestamp('2023-01-02', tz='UTC')
         assert cleaned['title'].iloc[1] == 'Unknown'
+        assert cleaned['title'].dtype == 'string[pyarrow]'
+        assert df.equals(pd.DataFrame(data))
+
+    def test_clean_all(self):
+        """Test both platforms are cleaned together and empty frames pass through."""
+        spotify = pd.DataFrame({'track_name': ['Song 1'], 'artist': [None], 'popularity': [50]})
+        youtube = pd.DataFrame()
+
+        spotify_clean, youtube_clean = clean_all(spotify, youtube)
+
+        assert spotify_clean.equals(clean_spotify_data(spotify))
+        assert youtube_clean is youtube
 
 class TestDataFetching:
     """Test data fetching components (mocked)."""
@@ -105,5 +282,261 @@ class TestDataFetching:
         # Should handle missing API keys gracefully
         assert fetcher.youtube is None or mock_build.called
 
+    @patch('data.fetch_spotify.spotipy.Spotify')
+    def test_trending_tracks_cached(self, mock_spotify):
+        """Test repeated trending fetches for the same market reuse the cached result."""
+        from data.fetch_spotify import SpotifyDataFetcher
+
+        fetcher = SpotifyDataFetcher()
+        fetcher.sp = Mock()
+        fetcher.sp.search.return_value = {'playlists': {'items': []}}
+
+        fetcher.get_trending_tracks(limit=10, market='GB')
+        fetcher.get_trending_tracks(limit=10, market='GB')
+
+        assert fetcher.sp.search.call_count == 1
+
+    @patch('data.fetch_spotify.spotipy.Spotify')
+    def test_trending_tracks_cache_not_shared(self, mock_spotify):
+        """Test callers modifying a trending result do not change what later callers get."""
+        from data.fetch_spotify import SpotifyDataFetcher
+
+        fetcher = SpotifyDataFetcher()
+        fetcher.sp = Mock()
+        fetcher.sp.search.return_value = {'playlists': {'items': [{'id': 'p1', 'name': 'Top 50'}]}}
+        fetcher.sp.playlist_tracks.return_value = {'items': [{'track': {
+            'id': 't1', 'name': 'Song', 'artists': [{'name': 'Artist'}], 'popularity': 50,
+            'duration_ms': 1000, 'external_urls': {'spotify': 'https://open.spotify.com/track/t1'}
+        }}]}
+
+        first = fetcher.get_trending_tracks(limit=10, market='SE')
+        first[0]['track_name'] = 'Changed'
+        first.clear()
+        second = fetcher.get_trending_tracks(limit=10, market='SE')
+
+        assert fetcher.sp.search.call_count == 1
+        assert [track['track_name'] for track in second] == ['Song']
+
+    @patch('data.fetch_spotify.spotipy.Spotify')
+    def test_trending_tracks_failure_not_cached(self, mock_spotify):
+        """Test a failed trending fetch is retried on the next call instead of cached."""
+        from data.fetch_spotify import SpotifyDataFetcher
+
+        fetcher = SpotifyDataFetcher()
+        fetcher.sp = Mock()
+        fetcher.sp.search.side_effect = [Exception('429 Too Many Requests'), {'playlists': {'items': []}}]
+
+        assert fetcher.get_trending_tracks(limit=10, market='FR') == []
+        assert fetcher.get_trending_tracks(limit=10, market='FR') == []
+        assert fetcher.sp.search.call_count == 2
+
+    @patch('data.fetch_youtube.build')
+    def test_trending_videos_failure_not_cached(self, mock_build):
+        """Test a failed YouTube trending fetch is retried on the next call instead of cached."""
+        from data.fetch_youtube import YouTubeDataFetcher
+
+        fetcher = YouTubeDataFetcher()
+        fetcher.youtube = Mock()
+        fetcher.response_cache = None
+        execute = fetcher.youtube.videos.return_value.list.return_value.execute
+        execute.side_effect = [Exception('quotaExceeded'),
+                               {'items': [{'id': 'v1', 'statistics': {'viewCount': '7'}}]}]
+
+        assert fetcher.get_trending_videos(region_code='FR').empty
+        videos = fetcher.get_trending_videos(region_code='FR')
+
+        assert execute.call_count == 2
+        assert videos.loc[0, 'view_count'] == 7
+
+    @patch('data.fetch_youtube.build')
+    def test_trending_videos_cache_not_shared(self, mock_build):
+        """Test callers modifying a trending frame do not change what later callers get."""
+        from data.fetch_youtube import YouTubeDataFetcher
+
+        fetcher = YouTubeDataFetcher()
+        fetcher.youtube = Mock()
+        fetcher.response_cache = None
+        execute = fetcher.youtube.videos.return_value.list.return_value.execute
+        execute.return_value = {'items': [{'id': 'v1', 'statistics': {'viewCount': '7'}}]}
+
+        first = fetcher.get_trending_videos(region_code='SE')
+        first.loc[0, 'view_count'] = 0
+        first['extra'] = 1
+        second = fetcher.get_trending_videos(region_code='SE')
+
+        assert execute.call_count == 1
+        assert second.loc[0, 'view_count'] == 7
+        assert 'extra' not in second.columns
+
+    @patch('data.fetch_spotify.spotipy.Spotify')
+    def test_genre_tracks_from_playlists(self, mock_spotify):
+        """Test tracks from concurrently fetched playlists keep playlist order."""
+        from data.fetch_spotify import SpotifyDataFetcher
+
+        def make_track(track_id):
+            return {'track': {
+                'id': track_id, 'name': track_id, 'artists': [{'name': 'Artist'}],
+                'album': {'name': 'Album', 'release_date': '2023-01-01'},
+                'popularity': 50, 'duration_ms': 1000,
+                'external_urls': {'spotify': f'https://open.spotify.com/track/{track_id}'}
+            }}
+
+        fetcher = SpotifyDataFetcher()
+        fetcher.sp = Mock()
+        fetcher.sp.search.return_value = {'playlists': {'items': [{'id': 'p1'}, None, {'id': 'p2'}]}}
+        fetcher.sp.playlist_tracks.side_effect = lambda playlist_id, limit, market: {
+            'items': [make_track(f'{playlist_id}-{i}') for i in range(limit)]
+        }
+
+        tracks = fetcher.get_top_tracks_by_genre('rock', limit=10, market='US')
+
+        assert [t['track_id'] for t in tracks] == ['p1-0', 'p1-1', 'p2-0', 'p2-1']
+        assert all(t['genre'] == 'rock' for t in tracks)
+
+    @patch('data.fetch_youtube.build')
+    def test_channel_stats_batched(self, mock_build):
+        """Test channel lookups are chunked into requests of at most 50 ids."""
+        from data.fetch_youtube import YouTubeDataFetcher
+
+        fetcher = YouTubeDataFetcher()
+        fetcher.youtube = Mock()
+        fetcher.response_cache = None
+        channels_list = fetcher.youtube.channels.return_value.list
+        channels_list.side_effect = lambda part, id, maxResults: Mock(execute=Mock(return_value={
+            'items': [{'id': channel_id, 'snippet': {'title': channel_id},
+                       'statistics': {'subscriberCount': '10'}}
+                      for channel_id in id.split(',')]
+        }))
+
+        channel_ids = [f'UC{i}' for i in range(120)]
+        channels = fetcher.get_channel_stats_batch(channel_ids)
+
+        assert channels_list.call_count == 3
+        assert list(channels) == channel_ids
+        assert channels['UC7']['subscriber_count'] == 10
+        assert fetcher.get_channel_stats('UC1')['channel_title'] == 'UC1'
+
+    @patch('data.fetch_youtube.build')
+    def test_video_stats_batched(self, mock_build):
+        """Test video lookups are chunked by id without maxResults, which videos().list rejects with id."""
+        from data.fetch_youtube import YouTubeDataFetcher
+
+        fetcher = YouTubeDataFetcher()
+        fetcher.youtube = Mock()
+        fetcher.response_cache = None
+        videos_list = fetcher.youtube.videos.return_value.list
+        videos_list.side_effect = lambda part, id: Mock(execute=Mock(return_value={
+            'items': [{'id': video_id, 'statistics': {}} for video_id in id.split(',')]
+        }))
+
+        video_ids = [f'v{i}' for i in range(60)]
+        stats = fetcher.get_video_stats_batch(video_ids)
+
+        assert videos_list.call_count == 2
+        assert list(stats) == video_ids
+
+    @patch('data.fetch_youtube.build')
+    def test_youtube_responses_cached(self, mock_build, tmp_path):
+        """Test repeated lookups are served from the response cache with the original fetch time."""
+        from data.fetch_youtube import ResponseCache, YouTubeDataFetcher
+
+        fetcher = YouTubeDataFetcher()
+        fetcher.youtube = Mock()
+        fetcher.response_cache = ResponseCache(ttl=60, cache_dir=str(tmp_path))
+        execute = fetcher.youtube.channels.return_value.list.return_value.execute
+        execute.return_value = {'items': [{'id': 'UC1', 'snippet': {}, 'statistics': {}}]}
+
+        first = fetcher.get_channel_stats('UC1')
+        second = fetcher.get_channel_stats('UC1')
+
+        assert execute.call_count == 1
+        assert first == second
+
+    @patch('data.fetch_youtube.build')
+    def test_trending_videos_multi_from_cache(self, mock_build, tmp_path):
+        """Test multi-region trending fetches are keyed by region and reuse cached responses."""
+        from data.fetch_youtube import ResponseCache, YouTubeDataFetcher
+
+        fetcher = YouTubeDataFetcher()
+        fetcher.youtube = Mock()
+        fetcher.response_cache = ResponseCache(ttl=60, cache_dir=str(tmp_path))
+        for region in ['US', 'GB']:
+            fetcher.response_cache.set(f'yt:trending:{region}:50:None', {
+                'response': {'items': [{'id': f'{region}-1', 'statistics': {'viewCount': '7'}}]},
+                'fetched_at': 0
+            })
+
+        videos = fetcher.get_trending_videos_multi(['US', 'GB'])
+
+        assert list(videos) == ['US', 'GB']
+        assert videos['GB'].loc[0, 'video_id'] == 'GB-1'
+        assert videos['GB'].loc[0, 'view_count'] == 7
+        assert videos['GB'].loc[0, 'region_code'] == 'GB'
+
+class TestCallbacks:
+    """Test dashboard callback helpers."""
+
+    def test_fetch_trending_data_throttled(self):
+        """Test back-to-back fetches for a region reuse the previous result."""
+        from dashboard import callbacks
+
+        with patch.object(callbacks.get_spotify_fetcher(), 'get_trending_tracks',
+                          return_value=[{'track_name': 'Song'}]) as mock_tracks, \
+             patch.object(callbacks.get_youtube_fetcher(), 'get_trending_videos',
+                          return_value=pd.DataFrame({'title': ['Video']})) as mock_videos:
+            first = callbacks.fetch_trending_data('ZZ')
+            second = callbacks.fetch_trending_data('ZZ')
+
+        assert first is second
+        assert first[0] == [{'track_name': 'Song'}]
+        assert list(first[1]['title']) == ['Video']
+        assert mock_tracks.call_count == 1
+        assert mock_videos.call_count == 1
+
+    def test_build_processed_payload(self):
+        """Test derived chart and card data are precomputed from the processed rows."""
+        from dashboard.callbacks import build_processed_payload
+
+        df = pd.DataFrame({
+            'content_title': ['A', 'B', 'C'],
+            'creator': ['X', 'X', 'Y'],
+            'engagement_score': [10, 30, 20],
+            'category': ['pop', 'rock', 'pop'],
+            'platform': ['Spotify', 'YouTube', 'YouTube'],
+            'view_count': [1000, 0, 500],
+            'like_count': [100, 5, 50]
+        })
+
+        payload = build_processed_payload(df)
+
+        assert list(payload['rows']['engagement_rate']) == [10.0, 0.0, 10.0]
+        assert list(payload['top10']['content_title']) == ['B', 'C', 'A']
+        assert payload['platform_counts'] == {'YouTube': 2, 'Spotify': 1}
+        assert payload['category_counts'] == {'pop': 2, 'rock': 1}
+        assert payload['metrics'] == ('3', '20', '1.0K', '2')
+
+    def test_decimate_scatter_points(self):
+        """Test large scatters keep the most-viewed rows and are capped in size."""
+        from dashboard.callbacks import decimate_scatter_points
+
+        df = pd.DataFrame({'view_count': range(5000), 'like_count': range(5000)})
+
+        points = decimate_scatter_points(df, max_points=1000, top_n=100)
+
+        assert len(points) == 1000
+        assert points.index.is_unique
+        assert set(range(4900, 5000)) <= set(points['view_count'])
+        assert decimate_scatter_points(df.head(10)).equals(df.head(10))
+
+    def test_top_category_counts(self):
+        """Test categorical counts are ranked and unused categories dropped."""
+        from dashboard.callbacks import top_category_counts
+
+        categories = pd.Series(['pop', 'rock', 'pop', None, 'jazz', 'pop', 'rock'],
+                               dtype=pd.CategoricalDtype(['jazz', 'pop', 'rock', 'metal']))
+
+        assert top_category_counts(categories) == {'pop': 3, 'rock': 2, 'jazz': 1}
+        assert top_category_counts(categories, n=2) == {'pop': 3, 'rock': 2}
+
 if __name__ == "__main__":
     pytest.main([__file__])
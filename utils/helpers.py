@@ -2,14 +2,46 @@
 Helper utilities for the Spotify-YouTube trend analysis dashboard.
 Includes functions for data manipulation, formatting, and common operations.
 """
+import numpy as np
 import pandas as pd
+from functools import lru_cache
 from typing import Dict, List, Any
 import re
+import threading
 
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; NumPy is used instead
+    njit = None
+
+try:
+    import polars as pl
+except ImportError:  # polars is optional; top-k uses NumPy partitioning instead
+    pl = None
+
+# Row count above which the parallel Numba kernel outperforms plain NumPy
+NUMBA_MIN_ROWS = 10_000
+
+# Dash serves callbacks from several threads, and numba's workqueue threading layer
+# aborts the process on concurrent launches; the kernel already spans every core
+_numba_lock = threading.Lock()
+
+# Row count above which polars' multi-threaded top_k outperforms np.partition
+POLARS_MIN_ROWS = 1_000_000
+
+# Platform labels used by merged frames, stored as a fixed categorical
+PLATFORM_DTYPE = pd.CategoricalDtype(['Spotify', 'YouTube'])
+
+# ISO 8601 video duration as used by YouTube (e.g. PT4M13S, P1DT2H)
+_DURATION_RE = re.compile(r'^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+
+@lru_cache(maxsize=4096)
 def format_number(num: float) -> str:
     """
     Format large numbers with appropriate suffixes (K, M, B).
 
+    Results are memoized, since dashboard repaints format the same values.
+
     Args:
         num: Number to format
 
@@ -25,6 +57,33 @@ def format_number(num: float) -> str:
     else:
         return str(int(num))
 
+def format_number_series(values) -> np.ndarray:
+    """
+    Format an array of numbers with K/M/B suffixes in one vectorized pass.
+
+    Vectorized counterpart of format_number; missing values become 'N/A'.
+
+    Args:
+        values: Array-like of numbers
+
+    Returns:
+        Array of formatted strings
+    """
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    whole = np.where(missing, 0, values).astype(np.int64).astype(str)
+
+    return np.select(
+        [missing, values >= 1e9, values >= 1e6, values >= 1e3],
+        [
+            'N/A',
+            np.char.mod('%.1fB', values / 1e9),
+            np.char.mod('%.1fM', values / 1e6),
+            np.char.mod('%.1fK', values / 1e3)
+        ],
+        default=whole
+    )
+
 def calculate_engagement_rate(likes: int, views: int) -> float:
     """
     Calculate engagement rate as (likes / views) * 100.
@@ -40,6 +99,38 @@ def calculate_engagement_rate(likes: int, views: int) -> float:
         return 0.0
     return (likes / views) * 100
 
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _engagement_rates_kernel(likes, views, out):
+        for i in prange(out.shape[0]):
+            out[i] = likes[i] / views[i] * 100.0 if views[i] > 0 else 0.0
+
+def calculate_engagement_rates(likes, views) -> np.ndarray:
+    """
+    Calculate engagement rates for arrays of likes and views.
+
+    Args:
+        likes: Array-like of like counts
+        views: Array-like of view counts
+
+    Returns:
+        Array of engagement rates as percentages (0 where there are no views)
+    """
+    likes = np.asarray(likes, dtype=np.float64)
+    views = np.asarray(views, dtype=np.float64)
+
+    if njit is not None and len(views) >= NUMBA_MIN_ROWS:
+        out = np.empty_like(views)
+        try:
+            with _numba_lock:
+                _engagement_rates_kernel(likes, views, out)
+            return out
+        except Exception:  # e.g. no threading layer could be loaded; NumPy gives the same result
+            pass
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(views > 0, likes / views * 100.0, 0.0)
+
 def parse_duration(duration: str) -> int:
     """
     Parse YouTube duration string (PT4M13S) to seconds.
@@ -50,30 +141,36 @@ def parse_duration(duration: str) -> int:
     Returns:
         Duration in seconds
     """
-    if not duration or not isinstance(duration, str):
+    # Extract days, hours, minutes, seconds in a single match; non-strings (None, NaN) raise TypeError
+    try:
+        match = _DURATION_RE.match(duration)
+    except TypeError:
+        return 0
+    if not match:
         return 0
 
-    # Remove 'PT' prefix
-    duration = duration.replace('PT', '')
-
-    hours = 0
-    minutes = 0
-    seconds = 0
+    days, hours, minutes, seconds = (int(group) if group else 0 for group in match.groups())
+    return days * 86400 + hours * 3600 + minutes * 60 + seconds
 
-    # Extract hours, minutes, seconds
-    hour_match = re.search(r'(\d+)H', duration)
-    if hour_match:
-        hours = int(hour_match.group(1))
+def parse_duration_series(durations: pd.Series) -> pd.Series:
+    """
+    Parse a Series of YouTube duration strings to seconds.
 
-    minute_match = re.search(r'(\d+)M', duration)
-    if minute_match:
-        minutes = int(minute_match.group(1))
+    Vectorized counterpart of parse_duration; invalid or missing values become 0.
 
-    second_match = re.search(r'(\d+)S', duration)
-    if second_match:
-        seconds = int(second_match.group(1))
+    Args:
+        durations: Series of YouTube duration strings
 
-    return hours * 3600 + minutes * 60 + seconds
+    Returns:
+        int32 Series of durations in seconds
+    """
+    # The .str accessor rejects Series without any strings (e.g. all numbers), which parse to 0
+    try:
+        parts = durations.astype(object).str.extract(_DURATION_RE).astype(np.float64).fillna(0)
+    except AttributeError:
+        return pd.Series(0, index=durations.index, name=durations.name, dtype=np.int32)
+    seconds = parts.to_numpy() @ np.array([86400, 3600, 60, 1], dtype=np.float64)
+    return pd.Series(seconds.astype(np.int32), index=durations.index, name=durations.name)
 
 def format_duration(seconds: int) -> str:
     """
@@ -94,6 +191,54 @@ def format_duration(seconds: int) -> str:
     else:
         return f"{minutes}:{seconds:02d}"
 
+# Formatted text for every second within an hour: 'M:SS' and the ':MM:SS' suffix
+_SHORT_DURATIONS = np.array([f"{s // 60}:{s % 60:02d}" for s in range(3600)], dtype=object)
+_HOUR_SUFFIXES = np.array([f":{s // 60:02d}:{s % 60:02d}" for s in range(3600)], dtype=object)
+
+def format_duration_array(seconds) -> np.ndarray:
+    """
+    Format an array of durations in seconds as H:MM:SS / M:SS strings.
+
+    Vectorized counterpart of format_duration.
+
+    Args:
+        seconds: Array-like of durations in seconds (a scalar is treated as one element)
+
+    Returns:
+        1-D object array of formatted duration strings
+    """
+    seconds = np.atleast_1d(np.asarray(seconds, dtype=np.int64))
+    hours, within_hour = np.divmod(seconds, 3600)
+
+    # The minutes/seconds part repeats every hour, so look it up instead of formatting it
+    formatted = _SHORT_DURATIONS[within_hour]
+    has_hours = hours > 0
+    formatted[has_hours] = hours[has_hours].astype(str).astype(object) + _HOUR_SUFFIXES[within_hour[has_hours]]
+    return formatted
+
+def _concat_columns(first: pd.Series, second: pd.Series):
+    """
+    Concatenate two columns into one array.
+
+    An empty side is ignored so it cannot change the dtype, and matching
+    extension dtypes (e.g. arrow-backed strings) are kept rather than
+    converted to object arrays.
+
+    Args:
+        first: First column
+        second: Second column
+
+    Returns:
+        NumPy or extension array with the values of both columns
+    """
+    if len(second) == 0:
+        return first.array
+    if len(first) == 0:
+        return second.array
+    if first.dtype == second.dtype and isinstance(first.dtype, pd.api.extensions.ExtensionDtype):
+        return first.array._concat_same_type([first.array, second.array])
+    return np.concatenate([first.to_numpy(), second.to_numpy()])
+
 def merge_platform_data(spotify_df: pd.DataFrame, youtube_df: pd.DataFrame) -> pd.DataFrame:
     """
     Merge Spotify and YouTube data for cross-platform analysis.
@@ -105,38 +250,41 @@ def merge_platform_data(spotify_df: pd.DataFrame, youtube_df: pd.DataFrame) -> p
     Returns:
         Merged DataFrame with platform comparison data
     """
-    # Standardize column names for merging
-    spotify_cols = {
-        'track_name': 'content_title',
-        'artist': 'creator',
-        'popularity': 'engagement_score',
-        'genre': 'category'
+    # Merged column -> (Spotify column, YouTube column)
+    column_sources = {
+        'content_title': ('track_name', 'title'),
+        'creator': ('artist', 'channel_title'),
+        'engagement_score': ('popularity', 'view_count')
     }
 
-    youtube_cols = {
-        'title': 'content_title',
-        'channel_title': 'creator',
-        'view_count': 'engagement_score',
-        'category_id': 'category'
+    # Build each merged column by concatenating the two source arrays once
+    columns = {
+        name: _concat_columns(spotify_df[spotify_col], youtube_df[youtube_col])
+        for name, (spotify_col, youtube_col) in column_sources.items()
     }
 
-    spotify_merged = spotify_df.rename(columns=spotify_cols)
-    youtube_merged = youtube_df.rename(columns=youtube_cols)
-
-    # Add platform identifier
-    spotify_merged['platform'] = 'Spotify'
-    youtube_merged['platform'] = 'YouTube'
-
-    # Select common columns for comparison
-    common_cols = ['content_title', 'creator', 'engagement_score', 'category', 'platform', 'fetched_at']
-
-    spotify_common = spotify_merged[common_cols]
-    youtube_common = youtube_merged[common_cols]
-
-    # Combine datasets
-    combined_df = pd.concat([spotify_common, youtube_common], ignore_index=True)
-
-    return combined_df
+    # Share one categorical dtype for category so the combined column stays categorical
+    spotify_category = spotify_df['genre'].astype('category')
+    youtube_category = youtube_df['category_id'].astype('category')
+    category_dtype = pd.CategoricalDtype(
+        spotify_category.cat.categories.union(youtube_category.cat.categories)
+    )
+    columns['category'] = pd.Categorical.from_codes(
+        np.concatenate([
+            spotify_category.cat.set_categories(category_dtype.categories).cat.codes.to_numpy(),
+            youtube_category.cat.set_categories(category_dtype.categories).cat.codes.to_numpy()
+        ]),
+        dtype=category_dtype
+    )
+
+    # Add platform identifier straight from int8 codes (0 = Spotify, 1 = YouTube), no string per row
+    columns['platform'] = pd.Categorical.from_codes(
+        np.repeat(np.array([0, 1], dtype=np.int8), [len(spotify_df), len(youtube_df)]),
+        dtype=PLATFORM_DTYPE
+    )
+    columns['fetched_at'] = _concat_columns(spotify_df['fetched_at'], youtube_df['fetched_at'])
+
+    return pd.DataFrame(columns)
 
 def get_top_content_by_metric(df: pd.DataFrame, metric: str, n: int = 10) -> pd.DataFrame:
     """
@@ -153,7 +301,49 @@ def get_top_content_by_metric(df: pd.DataFrame, metric: str, n: int = 10) -> pd.
     if metric not in df.columns:
         raise ValueError(f"Metric '{metric}' not found in DataFrame columns")
 
-    return df.nlargest(n, metric).reset_index(drop=True)
+    values = df[metric].to_numpy()
+    if values.dtype.kind not in 'iuf' or n <= 0 or len(values) <= n:
+        return df.nlargest(n, metric).reset_index(drop=True)
+
+    # Missing values never rank, as with nlargest
+    if values.dtype.kind == 'f':
+        valid = ~np.isnan(values)
+        values = np.where(valid, values, -np.inf)
+    else:
+        valid = np.ones(len(values), dtype=bool)
+    if valid.sum() <= n:
+        return df.nlargest(n, metric).reset_index(drop=True)
+
+    # Find the n-th largest value in linear time (polars' multi-threaded top_k on large frames)
+    if pl is not None and len(values) >= POLARS_MIN_ROWS:
+        kth = pl.Series(values).top_k(n).min()
+    else:
+        kth = np.partition(values, len(values) - n)[len(values) - n]
+
+    # Take the rows above the cut-off, then sort only the top n;
+    # ties at the cut-off keep their earliest rows, matching nlargest(keep='first')
+    above = np.flatnonzero(values > kth)
+    ties = np.flatnonzero((values == kth) & valid)[:n - len(above)]
+    top_idx = np.concatenate([above, ties])
+    top_idx = top_idx[np.lexsort((-top_idx, values[top_idx]))[::-1]]
+
+    return df.iloc[top_idx].reset_index(drop=True)
+
+def _safe_agg(df: pd.DataFrame, col: str, funcs: List[str]) -> Dict[str, Any]:
+    """
+    Run several reductions over a column in one agg call.
+
+    Args:
+        df: DataFrame to aggregate
+        col: Column name
+        funcs: Reduction names, e.g. ['mean', 'max']
+
+    Returns:
+        Dictionary mapping reduction name to result (NaN if col is missing)
+    """
+    if col not in df.columns:
+        return {func: np.nan for func in funcs}
+    return df[col].agg(funcs).to_dict()
 
 def calculate_trend_metrics(df: pd.DataFrame, date_col: str = 'fetched_at') -> Dict[str, Any]:
     """
@@ -169,17 +359,19 @@ def calculate_trend_metrics(df: pd.DataFrame, date_col: str = 'fetched_at') -> D
     if date_col not in df.columns:
         return {}
 
-    df_sorted = df.sort_values(date_col)
+    # Only the extremes are needed, so no sort
+    date_range = _safe_agg(df, date_col, ['min', 'max'])
+    engagement = _safe_agg(df, 'engagement_score', ['mean', 'max'])
 
     metrics = {
         'total_records': len(df),
         'date_range': {
-            'start': df_sorted[date_col].min(),
-            'end': df_sorted[date_col].max()
+            'start': date_range['min'],
+            'end': date_range['max']
         },
-        'avg_engagement': df.get('engagement_score', pd.Series()).mean(),
-        'max_engagement': df.get('engagement_score', pd.Series()).max(),
-        'unique_creators': df.get('creator', pd.Series()).nunique()
+        'avg_engagement': engagement['mean'],
+        'max_engagement': engagement['max'],
+        'unique_creators': df['creator'].nunique() if 'creator' in df.columns else 0
     }
 
     return metrics
@@ -2,8 +2,59 @@
 Data preprocessing and transformation utilities.
 Includes functions to clean, normalize, and prepare data for visualization.
 """
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple
+import numpy as np
 import pandas as pd
 
+# Pool for cleaning the two platforms side by side; the bulk pandas/numpy kernels release the GIL
+_clean_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='clean')
+
+def _to_label_category(series: pd.Series, fill_value: str = None) -> pd.Series:
+    """
+    Lowercase a label column and store it as a categorical.
+
+    Args:
+        series: Genre/category label column
+        fill_value: Optional label for missing values (lowercased like the rest)
+
+    Returns:
+        Lowercased categorical Series, so filters compare integer codes
+    """
+    labels = series.astype(object)
+    if fill_value is not None:
+        labels = labels.fillna(fill_value)
+    return labels.str.lower().astype('category')
+
+def _to_arrow_strings(df: pd.DataFrame, cols) -> pd.DataFrame:
+    """
+    Store text columns as arrow-backed strings.
+
+    Args:
+        df: DataFrame to convert
+        cols: Text column names; columns not in df are skipped
+
+    Returns:
+        New DataFrame with the present columns as string[pyarrow]
+    """
+    return df.astype({col: 'string[pyarrow]' for col in cols if col in df.columns})
+
+def _parse_utc_timestamps(series: pd.Series) -> pd.Series:
+    """
+    Parse ISO 8601 UTC timestamps such as YouTube's 2023-01-01T00:00:00Z.
+
+    The trailing 'Z' is stripped so pandas takes its fast ISO 8601 path and
+    localizes once with utc=True, instead of building a timezone per value.
+
+    Args:
+        series: Timestamp strings
+
+    Returns:
+        datetime64[ns, UTC] Series (NaT for unparseable values)
+    """
+    return pd.to_datetime(series.astype(object).str.removesuffix('Z'),
+                          format='ISO8601', errors='coerce', utc=True)
+
 def clean_spotify_data(df: pd.DataFrame) -> pd.DataFrame:
     """
     Clean and preprocess Spotify data.
@@ -14,17 +65,26 @@ def clean_spotify_data(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         Cleaned DataFrame
     """
-    df = df.copy()
+    # Store text as arrow-backed strings (returns a new frame, so the caller's frame is never modified)
+    df = _to_arrow_strings(df, ['track_name', 'artist'])
+
+    # Fill missing values
+    if 'artist' in df.columns:
+        df = df.assign(artist=df['artist'].fillna('Unknown'))
+
     # Convert release_date to datetime if exists
     if 'release_date' in df.columns:
-        df['release_date'] = pd.to_datetime(df['release_date'], errors='coerce')
+        # Release dates come as YYYY, YYYY-MM or YYYY-MM-DD depending on precision
+        df['release_date'] = pd.to_datetime(df['release_date'], format='ISO8601', errors='coerce')
 
-    # Fill missing values
-    df.fillna({'genre': 'Unknown', 'artist': 'Unknown'}, inplace=True)
+    # Store genre as lowercase categorical for fast filtering
+    if 'genre' in df.columns:
+        df['genre'] = _to_label_category(df['genre'], fill_value='Unknown')
 
-    # Normalize popularity to 0-1 scale
+    # Normalize popularity to 0-1 scale (scores are 0-100, so they fit in uint8)
     if 'popularity' in df.columns:
-        df['popularity_norm'] = df['popularity'] / 100.0
+        df['popularity'] = pd.to_numeric(df['popularity'], downcast='unsigned')
+        df['popularity_norm'] = df['popularity'].to_numpy(dtype=np.float32) / np.float32(100)
 
     return df
 
@@ -38,21 +98,48 @@ def clean_youtube_data(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         Cleaned DataFrame
     """
-    df = df.copy()
+    # Store text as arrow-backed strings (returns a new frame, so the caller's frame is never modified)
+    df = _to_arrow_strings(df, ['title', 'channel_title'])
+
+    # Fill missing values
+    df = df.assign(**{col: df[col].fillna('Unknown')
+                      for col in ('title', 'channel_title') if col in df.columns})
+
     # Convert published_at to datetime
     if 'published_at' in df.columns:
-        df['published_at'] = pd.to_datetime(df['published_at'], errors='coerce')
+        df['published_at'] = _parse_utc_timestamps(df['published_at'])
 
-    # Fill missing values
-    df.fillna({'title': 'Unknown', 'channel_title': 'Unknown'}, inplace=True)
+    # Store category as lowercase categorical for fast filtering
+    if 'category_id' in df.columns:
+        df['category_id'] = _to_label_category(df['category_id'])
 
-    # Normalize view_count and like_count to 0-1 scale
-    if 'view_count' in df.columns:
-        max_views = df['view_count'].max() if not df['view_count'].empty else 1
-        df['view_count_norm'] = df['view_count'] / max_views
+    # Downcast counts to the smallest unsigned dtype that holds them (kept as-is if any are negative)
+    count_cols = [col for col in ('view_count', 'like_count') if col in df.columns]
+    for col in count_cols:
+        df[col] = pd.to_numeric(df[col], downcast='unsigned')
 
-    if 'like_count' in df.columns:
-        max_likes = df['like_count'].max() if not df['like_count'].empty else 1
-        df['like_count_norm'] = df['like_count'] / max_likes
+    # Normalize view_count and like_count to 0-1 scale (one max pass, float32 output)
+    if count_cols:
+        maxes = df[count_cols].max().replace(0, 1)
+        for col in count_cols:
+            df[f'{col}_norm'] = df[col].to_numpy(dtype=np.float32) / np.float32(maxes[col])
 
     return df
+
+def clean_all(spotify_df: pd.DataFrame, youtube_df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Clean Spotify and YouTube data concurrently.
+
+    Args:
+        spotify_df: Raw Spotify data DataFrame
+        youtube_df: Raw YouTube data DataFrame
+
+    Returns:
+        Tuple of (cleaned Spotify DataFrame, cleaned YouTube DataFrame);
+        empty frames are returned unchanged
+    """
+    spotify_future = _clean_executor.submit(clean_spotify_data, spotify_df) if not spotify_df.empty else None
+    youtube_future = _clean_executor.submit(clean_youtube_data, youtube_df) if not youtube_df.empty else None
+
+    return (spotify_future.result() if spotify_future else spotify_df,
+            youtube_future.result() if youtube_future else youtube_df)